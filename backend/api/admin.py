@@ -1,6 +1,6 @@
 # admin.py
 from django.contrib import admin
-from .models import Event, Wishlist, EventSchedule, Feedback
+from .models import Event, Wishlist, EventSchedule, Feedback, MLJob
 
 class EventScheduleInline(admin.TabularInline):
     model = EventSchedule
@@ -30,4 +30,11 @@ class EventScheduleAdmin(admin.ModelAdmin):
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
     list_display = ('user', 'event', 'rating', 'created_at')
-    search_fields = ('user__username', 'event__title', 'comment')
\ No newline at end of file
+    search_fields = ('user__username', 'event__title', 'comment')
+
+
+@admin.register(MLJob)
+class MLJobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'progress', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
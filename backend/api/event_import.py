@@ -0,0 +1,146 @@
+# api/event_import.py
+# Bulk event import for onboarding a whole semester at once (POST
+# /api/events/import/ and `python manage.py import_events`). Every row is
+# validated before anything is written; the valid events, their schedule rows
+# and tag index rows are then inserted with bulk_create in one transaction,
+# with predictions filled from one batched model pass.
+
+import csv
+import io
+import json
+import time
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import Event, EventSchedule, EventTag, normalize_tag
+from .predictions import fill_predictions
+from .serializers import EventImportSerializer
+from .stats import invalidate_organizer_stats
+
+IMPORT_BATCH_SIZE = 500
+FORMATS = ('csv', 'json')
+
+
+def detect_format(filename='', content_type=''):
+    name = (filename or '').lower()
+    if name.endswith('.json') or 'json' in (content_type or ''):
+        return 'json'
+    if name.endswith('.csv') or 'csv' in (content_type or ''):
+        return 'csv'
+    raise ValueError("Unrecognised import format; use a .csv or .json file.")
+
+
+def parse_schedule(value):
+    """'18:00=Opening; 19:30=Networking' -> [{"time": "18:00", "activity": "Opening"}, ...]"""
+    items = []
+    for part in value.split(';'):
+        if not part.strip():
+            continue
+        when, sep, activity = part.partition('=')
+        if not sep:
+            raise ValueError(f"Schedule item {part.strip()!r} must look like time=activity.")
+        items.append({'time': when.strip(), 'activity': activity.strip()})
+    return items
+
+
+def parse_csv(text):
+    """
+    One event per row with EventImportSerializer's columns. tags is a
+    comma-separated cell and schedule uses time=activity items separated by
+    semicolons; empty cells are left out so field defaults apply.
+    """
+    rows = []
+    for raw in csv.DictReader(io.StringIO(text)):
+        row = {key.strip(): value.strip() for key, value in raw.items() if key and value and value.strip()}
+        if 'tags' in row:
+            row['tags'] = [tag.strip() for tag in row['tags'].split(',') if tag.strip()]
+        if 'schedule' in row:
+            row['schedule'] = parse_schedule(row['schedule'])
+        rows.append(row)
+    return rows
+
+
+def parse_json(text):
+    """A list of event objects, or {"events": [...]}; schedule is a list of {time, activity}"""
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('events')
+    if not isinstance(data, list):
+        raise ValueError('Expected a list of events or {"events": [...]}.')
+    return data
+
+
+def parse_import(text, fmt):
+    try:
+        return parse_csv(text) if fmt == 'csv' else parse_json(text)
+    except (csv.Error, json.JSONDecodeError) as e:
+        raise ValueError(f"Could not parse {fmt.upper()}: {e}")
+
+
+def _throughput(rows, seconds):
+    return round(rows / seconds) if seconds > 0 else rows
+
+
+def import_events(rows, organizer, predict=True, strict=False, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validate all rows, then bulk-insert the valid ones for `organizer`.
+
+    Invalid rows are reported (1-based "row" numbers) and skipped; with strict
+    nothing is written if any row fails, and dry_run only validates. With
+    predict, inserted events that came without a success_rate get predicted
+    ML fields.
+    Like the rest of bulk_create, post_save signals do not run: tag index rows
+    are written here, and past events get their actual_* fields from
+    `autofill_actuals` (which the retrain job runs first).
+    """
+    start = time.perf_counter()
+    validator = EventImportSerializer()
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        try:
+            valid.append(validator.run_validation(row))
+        except serializers.ValidationError as e:
+            errors.append({'row': number, 'errors': e.detail})
+
+    events, schedules = [], []
+    for data in valid:
+        schedules.append(data.pop('schedule', []))
+        events.append(Event(organizer=organizer, **data))
+    insert = bool(events) and not dry_run and not (strict and errors)
+    # Only events that are written get predictions, so `predicted` never counts discarded rows
+    predicted = fill_predictions(events) if predict and insert else 0
+    validated = time.perf_counter()
+
+    created = schedule_rows = 0
+    if insert:
+        with transaction.atomic():
+            Event.objects.bulk_create(events, batch_size=batch_size)
+            schedule_rows = len(EventSchedule.objects.bulk_create(
+                [EventSchedule(event=event, **item) for event, items in zip(events, schedules) for item in items],
+                batch_size=batch_size,
+            ))
+            EventTag.objects.bulk_create(
+                [EventTag(event=event, name=name) for event in events
+                 for name in dict.fromkeys(normalize_tag(t) for t in event.tags) if name],
+                batch_size=batch_size, ignore_conflicts=True,
+            )
+        invalidate_organizer_stats(organizer.pk)
+        created = len(events)
+    finished = time.perf_counter()
+
+    return {
+        'received': len(rows),
+        'valid': len(valid),
+        'failed': len(errors),
+        'created': created,
+        'schedules': schedule_rows,
+        'predicted': predicted,
+        'dry_run': dry_run,
+        'validate_s': round(validated - start, 4),
+        'insert_s': round(finished - validated, 4),
+        'total_s': round(finished - start, 4),
+        'rows_per_s': _throughput(len(rows), finished - start),
+        'ids': [event.pk for event in events] if created else [],
+        'errors': errors,
+    }
@@ -0,0 +1,55 @@
+# api/filters.py
+from datetime import date
+
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.exceptions import ValidationError
+
+from .models import EventTag, normalize_tag
+
+
+def _split(value):
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def parse_date_param(params, key):
+    value = params.get(key)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({key: "Use YYYY-MM-DD."})
+
+
+def filter_events(queryset, params):
+    """
+    Apply the /api/events/ query parameters. Each filter is an exact or range
+    match on an indexed column (category, department, date) or a lookup in the
+    EventTag table, so the database never has to scan the tags JSON.
+
+      ?category=Technology,Cultural  ?department=Computer  ?target_year=3
+      ?date_from=2025-01-01  ?date_to=2025-06-30  ?tags=ai,ml  ?q=hackathon
+    """
+    for field in ('category', 'department', 'target_year'):
+        values = _split(params.get(field, ''))
+        if values:
+            queryset = queryset.filter(**{f'{field}__in': values})
+
+    date_from = parse_date_param(params, 'date_from')
+    date_to = parse_date_param(params, 'date_to')
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+
+    tags = [normalize_tag(t) for t in _split(params.get('tags', ''))]
+    if tags:
+        # Events having any of the requested tags
+        queryset = queryset.filter(
+            Exists(EventTag.objects.filter(event=OuterRef('pk'), name__in=tags))
+        )
+
+    q = params.get('q', '').strip()
+    if q:
+        queryset = queryset.filter(Q(title__icontains=q) | Q(description__icontains=q))
+    return queryset
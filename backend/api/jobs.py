@@ -0,0 +1,119 @@
+# api/jobs.py
+# Database-backed queue for long-running ML work. Views only enqueue a job and
+# return 202; `python manage.py run_ml_worker` claims queued jobs and runs them
+# in its own process, so retraining never ties up a web worker.
+
+import traceback
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import MLJob
+
+HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register fn(job, report) as the runner for `kind`; report(progress, message) updates the job row"""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def active_job(kind):
+    return MLJob.objects.filter(kind=kind, status__in=MLJob.ACTIVE_STATUSES).first()
+
+
+def enqueue_job(kind, user=None, params=None):
+    """
+    Queue a job of `kind` unless one is already queued or running. Returns
+    (job, created); concurrent requests end up sharing the same job because the
+    mljob_one_active_per_kind constraint rejects a second active row.
+    """
+    existing = active_job(kind)
+    if existing:
+        return existing, False
+    try:
+        with transaction.atomic():
+            job = MLJob.objects.create(
+                kind=kind,
+                params=params or {},
+                requested_by=user if user is not None and user.is_authenticated else None,
+                message="Waiting for a worker",
+            )
+        return job, True
+    except IntegrityError:
+        # Lost the race with another request
+        return active_job(kind), False
+
+
+def claim_next_job():
+    """Mark the oldest queued job as running and return it (None when the queue is empty)"""
+    queued = MLJob.objects.filter(status=MLJob.QUEUED).order_by('created_at', 'id').values_list('id', flat=True)
+    for job_id in queued[:10]:
+        # Conditional UPDATE, so two workers never claim the same job
+        claimed = MLJob.objects.filter(pk=job_id, status=MLJob.QUEUED).update(
+            status=MLJob.RUNNING, started_at=timezone.now(), progress=0, message="Started"
+        )
+        if claimed:
+            return MLJob.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    def report(progress, message=''):
+        MLJob.objects.filter(pk=job.pk).update(progress=progress, message=message[:255])
+
+    try:
+        handler = HANDLERS[job.kind]
+        result = handler(job, report)
+    except Exception as e:
+        job.status = MLJob.FAILED
+        job.message = f"Failed: {e}"[:255]
+        job.error = traceback.format_exc()
+    else:
+        job.status = MLJob.SUCCEEDED
+        job.progress = 100
+        job.message = "Done"
+        job.result = result or {}
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'message', 'error', 'result', 'finished_at'])
+    return job
+
+
+def fail_stale_jobs(older_than=timedelta(hours=6)):
+    """Running jobs whose worker died never finish; fail them so the kind can be queued again"""
+    return MLJob.objects.filter(
+        status=MLJob.RUNNING, started_at__lt=timezone.now() - older_than
+    ).update(
+        status=MLJob.FAILED, message="Worker stopped before the job finished", finished_at=timezone.now()
+    )
+
+
+@job_handler(MLJob.RETRAIN_EVENT_PREDICTION)
+def retrain_event_prediction(job, report):
+    from ml.train_model import fit_event_model
+
+    if job.params.get('autofill_actuals'):
+        report(5, "Filling in actual results for past events")
+        call_command('autofill_actuals')
+    report(20, "Exporting completed events")
+    call_command('export_completed_events')
+    report(50, "Training event prediction model")
+    # Served workers pick up the new version on their next request
+    model_version, training_report = fit_event_model(warm_start=bool(job.params.get('warm_start')))
+    print(f"[ML] Event prediction model retrained successfully (version {model_version}).")
+    return {"model_version": model_version, "training_report": training_report}
+
+
+@job_handler(MLJob.RETRAIN_STUDENT_CLUSTERING)
+def retrain_student_clustering(job, report):
+    from ml.student_clustering import train_clustering_model
+
+    report(10, "Training student clustering model")
+    train_clustering_model()
+    print("[ML] Student clustering model retrained successfully.")
+    return {}
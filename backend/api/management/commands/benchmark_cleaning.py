@@ -0,0 +1,92 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from ml.clean_data import clean_event_dataset, combine_date_time, valid_date_mask
+
+
+def rowwise_valid_dates(dates):
+    # The per-row version clean_event_dataset used before valid_date_mask
+    def is_valid_date(date_str):
+        dt = pd.to_datetime(date_str, errors='coerce')
+        return not pd.isnull(dt) and 1900 <= dt.year <= 2100
+    return dates.apply(is_valid_date)
+
+
+def rowwise_combine(dates, times):
+    frame = pd.DataFrame({'date': dates, 'time': times.dt.time})
+    return frame.apply(lambda row: datetime.combine(row['date'], row['time']), axis=1)
+
+
+def synthetic_events(n, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 900, n), unit='D')
+    dates = days.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    dates[rng.random(n) < 0.01] = '1111-11-11'  # a few invalid rows, like the real export
+    return pd.DataFrame({
+        'event_title': np.char.add('Event ', rng.integers(0, n, n).astype(str)),
+        'category': rng.choice(['Technology', 'Cultural', 'Sports', 'Academic', 'Professional'], n),
+        'department': rng.choice(['Computer', 'Management', 'Science', 'Civil'], n),
+        'target_year': rng.integers(1, 5, n),
+        'capacity': rng.integers(50, 400, n),
+        'location': rng.choice(['Auditorium', 'Main Hall', 'Seminar Room'], n),
+        'date': dates,
+        'time': [f'{h:02d}:{m:02d}' for h, m in zip(rng.integers(8, 20, n), rng.choice([0, 15, 30, 45], n))],
+        'event_tags': rng.choice(['ai, ml', 'sports', 'music, culture', 'career'], n),
+        'success_rate': rng.uniform(30, 99, n).round(1),
+    })
+
+
+class Command(BaseCommand):
+    help = 'Rows/sec of the date transforms in clean_event_dataset (vectorized vs row-wise) on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated row counts')
+        parser.add_argument('--rowwise-max', type=int, default=100000,
+                            help='Skip the row-wise baseline above this many rows (it is slow)')
+        parser.add_argument('--full', action='store_true', help='Also time the whole clean_event_dataset')
+
+    def rate(self, n, seconds):
+        return f'{n / seconds:>12,.0f} rows/s ({seconds:.3f}s)'
+
+    def time_transforms(self, df, valid_fn, combine_fn):
+        start = time.perf_counter()
+        mask = valid_fn(df['date'])
+        if isinstance(mask, tuple):
+            mask = mask[0]
+        valid = df[mask]
+        dates = pd.to_datetime(valid['date'], format='%Y-%m-%d')
+        times = pd.to_datetime(valid['time'], format='%H:%M')
+        combined = combine_fn(dates, times)
+        return time.perf_counter() - start, combined
+
+    def handle(self, *args, **options):
+        for n in [int(s) for s in options['sizes'].split(',') if s.strip()]:
+            df = synthetic_events(n)
+            self.stdout.write(f'{n:,} rows')
+            seconds, vectorized = self.time_transforms(df, valid_date_mask, combine_date_time)
+            self.stdout.write(f'  vectorized date transforms  {self.rate(n, seconds)}')
+            if n <= options['rowwise_max']:
+                seconds, rowwise = self.time_transforms(df, rowwise_valid_dates, rowwise_combine)
+                same = vectorized.equals(rowwise)
+                self.stdout.write(f'  row-wise date transforms    {self.rate(n, seconds)} identical={same}')
+            if options['full']:
+                with tempfile.TemporaryDirectory() as tmp:
+                    path = os.path.join(tmp, 'events.csv')
+                    df.to_csv(path, index=False)
+                    cwd = os.getcwd()
+                    os.chdir(tmp)  # clean_event_dataset writes cleaned_metadata.json to the cwd
+                    try:
+                        start = time.perf_counter()
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            clean_event_dataset(path)
+                        seconds = time.perf_counter() - start
+                    finally:
+                        os.chdir(cwd)
+                self.stdout.write(f'  clean_event_dataset (full)  {self.rate(n, seconds)}')
@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from ml.lookup_grid import build_lookup_grid, capacity_knots
+from ml.model import EventSuccessPredictor
+from ml.registry import get_event_model
+
+
+class Command(BaseCommand):
+    help = ('Accuracy and latency of lookup-grid predictions against the served model, '
+            'for several capacity knot spacings (grids are built in memory, nothing is saved)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity-steps', default='5,10,25,50', help='Comma-separated seats between knots')
+        parser.add_argument('--samples', type=int, default=5000, help='Random in-grid feature rows to compare')
+        parser.add_argument('--max-capacity', type=int, default=1000)
+        parser.add_argument('--max-tags', type=int, default=3)
+
+    def per_row_ms(self, score, X, repeat=200):
+        start = time.perf_counter()
+        for i in range(repeat):
+            score(X[i % len(X)][None, :])
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def batch_rows_per_s(self, score, X):
+        start = time.perf_counter()
+        score(X)
+        return len(X) / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        loaded = get_event_model()
+        data = loaded.data
+        model = EventSuccessPredictor(data, loaded.version)
+        shape = [max(data[key].values()) + 1 for key in ('category_map', 'department_map', 'year_map')]
+
+        rng = np.random.default_rng(0)
+        n = options['samples']
+        X = np.column_stack([
+            rng.integers(0, shape[0], n), rng.integers(0, shape[1], n), rng.integers(0, shape[2], n),
+            rng.integers(45, options['max_capacity'] + 1, n), rng.integers(0, options['max_tags'] + 1, n),
+        ]).astype(float)
+        truth = np.column_stack(model.predict_with_confidence(X))
+
+        self.stdout.write(f'model {loaded.version}: {self.per_row_ms(model.predict_with_confidence, X):.3f} ms/row, '
+                          f'{self.batch_rows_per_s(model.predict_with_confidence, X):,.0f} rows/s batched')
+        self.stdout.write(f"{'step':>5} {'cells':>8} {'MB':>6} {'build s':>8} {'MAE':>7} {'max err':>8} "
+                          f"{'same %':>7} {'ms/row':>8} {'rows/s':>12}")
+        for step in [int(s) for s in options['capacity_steps'].split(',') if s.strip()]:
+            start = time.perf_counter()
+            grid = build_lookup_grid(model.predict_with_confidence, *shape,
+                                     capacities=capacity_knots([45, options['max_capacity']], step),
+                                     max_tags=options['max_tags'], model_id='benchmark')
+            build_s = time.perf_counter() - start
+            served = EventSuccessPredictor(data, loaded.version, grid=grid)
+            scores = np.column_stack(served.score(X))
+            error = np.abs(scores[:, 0] - truth[:, 0])
+            same = np.mean(np.round(scores[:, 0]) == np.round(truth[:, 0])) * 100
+            self.stdout.write(
+                f'{step:>5} {grid.cells:>8,} {grid.values.nbytes / 1024 / 1024:>6.2f} {build_s:>8.2f} '
+                f'{error.mean():>7.3f} {error.max():>8.3f} {same:>7.1f} '
+                f'{self.per_row_ms(served.score, X):>8.3f} {self.batch_rows_per_s(served.score, X):>12,.0f}'
+            )
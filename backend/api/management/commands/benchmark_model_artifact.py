@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ml.registry import FOREST_PATH, MODEL_PATH
+
+# Runs in a fresh interpreter per worker: import the libraries first so only the
+# artifact itself is measured, load it, predict once, report, then stay alive
+# until the parent has measured every worker side by side.
+WORKER = r'''
+import json, os, sys, time, warnings
+import numpy as np, sklearn.ensemble
+warnings.simplefilter('ignore')  # feature-name warnings from predicting on a bare array
+sys.path.insert(0, sys.argv[3])
+
+def memory_kb():
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields
+
+before = memory_kb()
+start = time.perf_counter()
+if sys.argv[1] == 'pickle':
+    from ml.registry import _load_pickle
+    data = _load_pickle(sys.argv[2])
+else:
+    from ml.forest_artifact import load_event_model_artifact
+    data = load_event_model_artifact(sys.argv[2])
+load_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+data['model'].predict(np.array([[0, 0, 2, 100, 3]], dtype=float))
+predict_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({'pid': os.getpid(), 'load_ms': load_ms, 'first_predict_ms': predict_ms, 'before': before}), flush=True)
+sys.stdin.read()
+'''
+
+
+def _smaps_rollup(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields
+
+
+class Command(BaseCommand):
+    help = 'Compare cold-start time and per-worker memory of model.pkl against the memory-mapped model.forest'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent worker processes per format')
+
+    def measure(self, fmt, path, workers):
+        backend_dir = str(settings.BASE_DIR)
+        procs = [
+            subprocess.Popen([sys.executable, '-c', WORKER, fmt, path, backend_dir],
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=backend_dir)
+            for _ in range(workers)
+        ]
+        try:
+            reports = [json.loads(p.stdout.readline()) for p in procs]
+            # Every worker is alive now, so PSS splits the shared pages between them
+            for report in reports:
+                after = _smaps_rollup(report['pid'])
+                report['rss_mb'] = (after['Rss'] - report['before']['Rss']) / 1024
+                report['pss_mb'] = (after['Pss'] - report['before']['Pss']) / 1024
+        finally:
+            for p in procs:
+                p.stdin.close()
+                p.wait()
+        n = len(reports)
+        return {
+            'file_mb': os.path.getsize(path) / 1024 / 1024,
+            'load_ms': sum(r['load_ms'] for r in reports) / n,
+            'first_predict_ms': sum(r['first_predict_ms'] for r in reports) / n,
+            'rss_mb': sum(r['rss_mb'] for r in reports) / n,
+            'pss_mb': sum(r['pss_mb'] for r in reports) / n,
+        }
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            self.stderr.write('This benchmark reads /proc/<pid>/smaps_rollup and needs Linux.')
+            return
+        self.stdout.write(f"{'format':<8} {'file MB':>8} {'load ms':>9} {'1st predict ms':>15} "
+                          f"{'RSS MB/worker':>14} {'PSS MB/worker':>14}")
+        for fmt, path in (('pickle', MODEL_PATH), ('forest', FOREST_PATH)):
+            if not os.path.exists(path):
+                self.stdout.write(f'{fmt:<8} missing ({path}); run python -m ml.train_model first')
+                continue
+            r = self.measure(fmt, path, options['workers'])
+            self.stdout.write(f"{fmt:<8} {r['file_mb']:>8.2f} {r['load_ms']:>9.1f} {r['first_predict_ms']:>15.2f} "
+                              f"{r['rss_mb']:>14.2f} {r['pss_mb']:>14.2f}")
@@ -0,0 +1,39 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from ml.neighbors import benchmark_neighbor_index
+
+
+class Command(BaseCommand):
+    help = 'Report recall@k and query latency of the student similarity backends against exact search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=5)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--synthetic', type=int, default=0,
+                            help='Benchmark on N synthetic students instead of the trained index')
+        parser.add_argument('--dims', type=int, default=500, help='Feature columns for --synthetic')
+        parser.add_argument('--clusters', type=int, default=5, help='Clusters for --synthetic')
+
+    def synthetic(self, n, dims, n_clusters):
+        # Sparse 0/1 tag-like vectors drawn around a few interest profiles
+        rng = np.random.default_rng(0)
+        profiles = rng.random((n_clusters * 8, dims)) < 0.05
+        features = profiles[rng.integers(0, len(profiles), n)] ^ (rng.random((n, dims)) < 0.02)
+        clusters = rng.integers(0, n_clusters, n).astype(np.int32)
+        return features.astype(np.float32), clusters
+
+    def handle(self, *args, **options):
+        if options['synthetic']:
+            features, clusters = self.synthetic(options['synthetic'], options['dims'], options['clusters'])
+        else:
+            from ml.student_clustering import load_similarity_index
+            index = load_similarity_index()
+            features, clusters = index.features, index.clusters
+
+        self.stdout.write(f"Students: {features.shape[0]}, features: {features.shape[1]}, k={options['k']}")
+        report = benchmark_neighbor_index(features, clusters, k=options['k'], n_queries=options['queries'])
+        for backend, stats in report.items():
+            self.stdout.write(
+                f"{backend:>18}: recall@{options['k']}={stats['recall_at_k']:.3f}  "
+                f"{stats['avg_query_ms']:.3f} ms/query  build {stats['build_s']:.3f}s"
+            )
@@ -1,66 +1,154 @@
 import csv
-from django.core.management.base import BaseCommand
-from api.models import Event
+import json
 import os
+
+from django.core.management.base import BaseCommand
 from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from api.models import Event
+from ml.registry import atomic_write
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+EVENT_DATASET_PATH = os.path.join(BACKEND_DIR, "ml", "data", "event_dataset.csv")
+
+DATASET_HEADER = [
+    'event_title', 'category', 'department', 'target_year', 'capacity',
+    'location', 'date', 'time', 'event_tags', 'success_rate', 'actual_success_rate',
+    'actual_attendees', 'actual_engagement', 'actual_sentiment', 'event_id'
+]
+
+
+def state_path_for(dataset_path):
+    return os.path.splitext(dataset_path)[0] + ".export_state.json"
+
+
+def load_watermark(state_path):
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path, 'r') as f:
+        return parse_datetime(json.load(f).get('watermark') or '')
+
+
+def save_watermark(state_path, watermark):
+    atomic_write(state_path, lambda f: json.dump({'watermark': watermark.isoformat()}, f), mode='w')
+
+
+def completed_events(since=None):
+    events = Event.objects.filter(
+        Q(actual_attendees__gt=0) |
+        Q(actual_engagement__gt=0) |
+        Q(actual_success_rate__gt=0)
+    )
+    if since is not None:
+        events = events.filter(actuals_updated_at__gt=since)
+    return events.order_by('actuals_updated_at', 'id')
+
+
+def dataset_row(event):
+    return {
+        'event_title': event.title,
+        'category': event.category,
+        'department': event.department,
+        'target_year': event.target_year,
+        'capacity': event.max_capacity,
+        'location': event.location,
+        'date': event.date.isoformat(),
+        'time': event.time.strftime('%H:%M') if event.time else '',
+        'event_tags': ', '.join(event.tags or []),
+        # The observed outcome is the training target
+        'success_rate': event.actual_success_rate,
+        'actual_success_rate': event.actual_success_rate,
+        'actual_attendees': event.actual_attendees,
+        'actual_engagement': event.actual_engagement,
+        'actual_sentiment': event.actual_sentiment,
+        'event_id': event.id,
+    }
+
+
+def _legacy_key(row):
+    # Rows appended before the dataset had an event_id column
+    return (row.get('event_title') or '', (row.get('date') or '').strip())
+
+
+def upsert_rows(dataset_path, rows):
+    """
+    Insert or replace rows keyed by event_id. New events are appended; the file
+    is rewritten (atomically) only when an event is already present or the
+    header needs the event_id column. Returns (inserted, updated).
+    """
+    if not rows:
+        return 0, 0
+    existing, header = [], []
+    if os.path.exists(dataset_path):
+        with open(dataset_path, 'r', newline='') as f:
+            reader = csv.DictReader(f, restval='')
+            header = reader.fieldnames or []
+            existing = list(reader)
+    full_header = header + [col for col in DATASET_HEADER if col not in header]
+
+    by_id = {row['event_id']: i for i, row in enumerate(existing) if row.get('event_id')}
+    by_legacy = {_legacy_key(row): i for i, row in enumerate(existing) if not row.get('event_id')}
+    inserted = []
+    updated = 0
+    for row in rows:
+        i = by_id.get(str(row['event_id']))
+        if i is None:
+            i = by_legacy.pop((row['event_title'], row['date']), None)
+        if i is None:
+            inserted.append(row)
+        else:
+            existing[i] = row
+            updated += 1
+
+    if updated or (header and full_header != header):
+        def write(f):
+            writer = csv.DictWriter(f, fieldnames=full_header, extrasaction='ignore', lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(existing + inserted)
+        atomic_write(dataset_path, write, mode='w')
+    else:
+        _append_rows(dataset_path, full_header, inserted, write_header=not header)
+    return len(inserted), updated
+
+
+def _append_rows(dataset_path, header, rows, write_header):
+    needs_newline = False
+    if os.path.exists(dataset_path) and os.path.getsize(dataset_path):
+        with open(dataset_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    with open(dataset_path, 'a', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        writer = csv.DictWriter(f, fieldnames=header, extrasaction='ignore', lineterminator='\n')
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+
 
 class Command(BaseCommand):
-    help = 'Export completed events to updated_event_dataset.csv, append to event_dataset.csv, and clear updated_event_dataset.csv'
-
-    def handle(self, *args, **kwargs):
-        backend_dir = os.path.dirname(
-            os.path.dirname(
-                os.path.dirname(
-                    os.path.dirname(os.path.abspath(__file__))
-                )
-            )
-        )  # goes up to backend/
-        updated_path = os.path.join(backend_dir, "updated_event_dataset.csv")
-        event_path = os.path.join(backend_dir, "ml", "data", "event_dataset.csv")
-        print(f"DEBUG: Looking for updated_event_dataset.csv at {updated_path}")
-
-        # Step 1: Export completed events to updated_event_dataset.csv
-        completed_events = Event.objects.filter(
-            Q(actual_attendees__gt=0) |
-            Q(actual_engagement__gt=0) |
-            Q(actual_success_rate__gt=0)
-        ).distinct()
-        header = [
-            'event_title', 'category', 'department', 'target_year', 'capacity',
-            'location', 'date', 'time', 'event_tags', 'actual_success_rate',
-            'actual_attendees', 'actual_engagement', 'actual_sentiment'
-        ]
-        with open(updated_path, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(header)
-            for event in completed_events:
-                writer.writerow([
-                    event.title, event.category, event.department, event.target_year,
-                    event.max_capacity, event.location, event.date, event.time,
-                    ','.join(event.tags), event.actual_success_rate,
-                    event.actual_attendees, event.actual_engagement, event.actual_sentiment
-                ])
-
-        # Step 2: Append updated_event_dataset.csv to event_dataset.csv and clear updated_event_dataset.csv
-        with open(updated_path, 'r', newline='') as updated_file:
-            reader = list(csv.reader(updated_file))
-            if len(reader) <= 1:
-                self.stdout.write(self.style.WARNING('No new events to append.'))
-                return
-            # header = reader[0]
-            rows = reader[1:]
-
-        file_exists = os.path.exists(event_path)
-        with open(event_path, 'a', newline='') as event_file:
-            writer = csv.writer(event_file)
-            if not file_exists:
-                writer.writerow(header)
-            for row in rows:
-                writer.writerow(row)
-
-        # Empty updated_event_dataset.csv (keep header)
-        with open(updated_path, 'w', newline='') as updated_file:
-            writer = csv.writer(updated_file)
-            writer.writerow(header)
-
-        self.stdout.write(self.style.SUCCESS(f'Exported and appended {len(rows)} events to {event_path} and cleared updated_event_dataset.csv'))
\ No newline at end of file
+    help = ('Upsert events completed since the last run into ml/data/event_dataset.csv, '
+            'keyed by event id')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', default=EVENT_DATASET_PATH, help='Training CSV to upsert into')
+        parser.add_argument('--full', action='store_true', help='Ignore the watermark and re-export every completed event')
+
+    def handle(self, *args, **options):
+        dataset_path = options['dataset']
+        state_path = state_path_for(dataset_path)
+        watermark = None if options['full'] else load_watermark(state_path)
+
+        events = list(completed_events(since=watermark))
+        if not events:
+            self.stdout.write(self.style.WARNING('No newly completed events to export.'))
+            return
+        inserted, updated = upsert_rows(dataset_path, [dataset_row(e) for e in events])
+
+        stamps = [e.actuals_updated_at for e in events if e.actuals_updated_at] + ([watermark] if watermark else [])
+        if stamps:
+            save_watermark(state_path, max(stamps))
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {len(events)} completed events to {dataset_path} ({inserted} new, {updated} updated)'
+        ))
@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from api.event_import import FORMATS, IMPORT_BATCH_SIZE, detect_format, import_events, parse_import
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import events with schedules from a CSV or JSON file (see api/event_import.py for the columns)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file of events')
+        parser.add_argument('--organizer', required=True, help='Username of the organizer who owns the events')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--strict', action='store_true', help='Import nothing if any row is invalid')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only')
+        parser.add_argument('--no-predict', action='store_true', help='Do not fill in predicted ML fields')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            organizer = User.objects.get(username=options['organizer'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['organizer']!r}")
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+            with open(options['path'], encoding='utf-8-sig') as f:
+                rows = parse_import(f.read(), fmt)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        report = import_events(
+            rows, organizer,
+            predict=not options['no_predict'], strict=options['strict'],
+            dry_run=options['dry_run'], batch_size=options['batch_size'],
+        )
+        for error in report['errors'][:50]:
+            self.stdout.write(self.style.WARNING(f"row {error['row']}: {json.dumps(error['errors'])}"))
+        if len(report['errors']) > 50:
+            self.stdout.write(self.style.WARNING(f"... and {len(report['errors']) - 50} more invalid rows"))
+
+        summary = (f"{report['received']} rows: {report['valid']} valid, {report['failed']} invalid, "
+                   f"{report['created']} events and {report['schedules']} schedule rows created, "
+                   f"{report['predicted']} predicted in {report['total_s']}s ({report['rows_per_s']} rows/s; "
+                   f"validate {report['validate_s']}s, insert {report['insert_s']}s)")
+        style = self.style.SUCCESS if report['created'] or (report['dry_run'] and report['valid']) else self.style.ERROR
+        self.stdout.write(style(summary))
@@ -113,7 +113,7 @@ class Command(BaseCommand):
                         event=event,
                         rating=random.randint(1,5),
                         comment=fake.sentence(nb_words=10),
-                        sentiment=random.choice(['Positive', 'Neutral', 'Negative'])
+                        sentiment=random.choice(['positive', 'neutral', 'negative'])
                     )
             self.stdout.write(self.style.SUCCESS("✅ Feedbacks added"))
 
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from api.models import Event
+
+class Command(BaseCommand):
+    help = 'Resync the EventTag index from Event.tags (e.g. after bulk updates that bypass save())'
+
+    def handle(self, *args, **kwargs):
+        count = 0
+        for event in Event.objects.only('id', 'tags').iterator(chunk_size=500):
+            event.sync_tag_index()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt tag index for {count} events'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from api.rollups import rebuild_rollups
+
+class Command(BaseCommand):
+    help = 'Recompute the weekly per-tag registration rollups used by the trending interests dashboard'
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} tag rollup buckets'))
@@ -0,0 +1,36 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from api.jobs import claim_next_job, fail_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued ML jobs (model retraining) outside the web process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every queued job, then exit')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds between queue checks when idle')
+        parser.add_argument('--stale-after', type=int, default=6 * 3600,
+                            help='Fail running jobs started more than this many seconds ago (dead worker)')
+
+    def handle(self, *args, **options):
+        stale = fail_stale_jobs(timedelta(seconds=options['stale_after']))
+        if stale:
+            self.stdout.write(self.style.WARNING(f'Marked {stale} stale running jobs as failed'))
+        self.stdout.write('ML worker started')
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+                continue
+            self.stdout.write(f'Running {job.kind} job #{job.pk}')
+            start = time.perf_counter()
+            job = run_job(job)
+            elapsed = time.perf_counter() - start
+            if job.status == job.SUCCEEDED:
+                self.stdout.write(self.style.SUCCESS(f'Job #{job.pk} succeeded in {elapsed:.1f}s'))
+            else:
+                self.stdout.write(self.style.ERROR(f'Job #{job.pk} failed after {elapsed:.1f}s: {job.message}'))
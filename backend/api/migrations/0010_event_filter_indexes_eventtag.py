@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_event_tags(apps, schema_editor):
+    Event = apps.get_model('api', 'Event')
+    EventTag = apps.get_model('api', 'EventTag')
+    rows = []
+    for event_id, tags in Event.objects.values_list('id', 'tags').iterator():
+        names = {str(t).strip().lower()[:100] for t in (tags or [])}
+        rows.extend(EventTag(event_id=event_id, name=name) for name in names if name)
+    EventTag.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_event_feed_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='category',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='department',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+        migrations.CreateModel(
+            name='EventTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_index', to='api.event')),
+            ],
+            options={
+                'unique_together': {('event', 'name')},
+            },
+        ),
+        migrations.RunPython(backfill_event_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:20
+
+from django.db import migrations
+from django.db.models.functions import Lower, Trim
+
+
+def lowercase_sentiments(apps, schema_editor):
+    Feedback = apps.get_model('api', 'Feedback')
+    Feedback.objects.update(sentiment=Lower(Trim('sentiment')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_event_filter_indexes_eventtag'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_sentiments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    # Registrations made before the signals existed; same buckets as manage.py rebuild_tag_rollups
+    from api.rollups import rebuild_rollups
+    rebuild_rollups(apps.get_model('api', 'EventTag'), apps.get_model('api', 'TagRegistrationRollup'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_normalize_feedback_sentiment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagRegistrationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=100)),
+                ('week_start', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organizer', 'week_start'], name='tag_rollup_week_idx')],
+                'unique_together': {('organizer', 'tag', 'week_start')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:34
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_actuals_updated_at(apps, schema_editor):
+    # Actuals filled before this field existed: date them at creation so the
+    # first incremental export still picks them up
+    Event = apps.get_model('api', 'Event')
+    Event.objects.filter(actual_success_rate__isnull=False).update(actuals_updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_ml_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='actuals_updated_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_actuals_updated_at, migrations.RunPython.noop),
+    ]
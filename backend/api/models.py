@@ -1,18 +1,44 @@
 # api/models.py
 from django.db import models
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from accounts.models import User
 from django.contrib.auth import get_user_model
 User = get_user_model()
+
+class EventQuerySet(models.QuerySet):
+    def with_list_details(self, user=None, include_schedule=True):
+        """
+        Load everything EventSerializer needs in a constant number of queries:
+        the organizer via JOIN, schedules via one prefetch, and the registration
+        count / is_registered flag as correlated subqueries.
+        """
+        registrations = Event.registered_users.through.objects.filter(event_id=OuterRef('pk'))
+        # A subquery (rather than Count('registered_users')) keeps the count correct
+        # when the queryset is already filtered on registered_users
+        registered_count = registrations.order_by().values('event_id').annotate(c=Count('*')).values('c')
+        qs = self.select_related('organizer')
+        if include_schedule:
+            qs = qs.prefetch_related('schedule')
+        qs = qs.annotate(
+            registered_users_count=Coalesce(Subquery(registered_count, output_field=IntegerField()), Value(0))
+        )
+        if user is not None and user.is_authenticated:
+            qs = qs.annotate(is_registered=Exists(registrations.filter(user_id=user.id)))
+        else:
+            qs = qs.annotate(is_registered=Value(False))
+        return qs
+
 class Event(models.Model):
     organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='events')
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
-    date = models.DateField()
+    date = models.DateField(db_index=True)
     time = models.TimeField(null=True, blank=True)
     location = models.CharField(max_length=255, blank=True)
-    category = models.CharField(max_length=100)
+    category = models.CharField(max_length=100, db_index=True)
     target_year = models.CharField(max_length=50, blank=True)
-    department = models.CharField(max_length=100, blank=True)
+    department = models.CharField(max_length=100, blank=True, db_index=True)
     max_capacity = models.PositiveIntegerField()
     tags = models.JSONField(default=list, blank=True)
 
@@ -28,16 +54,74 @@ class Event(models.Model):
     actual_attendees = models.PositiveIntegerField(null=True, blank=True)
     actual_engagement = models.FloatField(null=True, blank=True)
     actual_sentiment = models.CharField(max_length=50, blank=True, null=True)
+    # When the actual_* fields were last filled in; export_completed_events' watermark
+    actuals_updated_at = models.DateTimeField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     registered_users = models.ManyToManyField(User, related_name='registered_events', blank=True)
 
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination for the public feed (see api/pagination.py)
+            models.Index(fields=['-date', '-time', '-id'], name='event_feed_idx'),
+        ]
 
     def __str__(self):
         return self.title
     def attendee_count(self):
         return self.registered_users.count()
 
+    def sync_tag_index(self):
+        """
+        Mirror the tags JSON list into EventTag rows so tag filters are indexed
+        lookups. Returns the (added, removed) tag names.
+        """
+        wanted = {normalize_tag(t) for t in (self.tags or []) if normalize_tag(t)}
+        existing = set(self.tag_index.values_list('name', flat=True))
+        added, removed = wanted - existing, existing - wanted
+        if removed:
+            self.tag_index.filter(name__in=removed).delete()
+        if added:
+            EventTag.objects.bulk_create(
+                [EventTag(event=self, name=name) for name in added],
+                ignore_conflicts=True
+            )
+        return added, removed
+
+
+def normalize_tag(tag):
+    return str(tag).strip().lower()[:100]
+
+
+class EventTag(models.Model):
+    # Denormalized copy of Event.tags, kept in sync by api.signals
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='tag_index')
+    name = models.CharField(max_length=100, db_index=True)
+
+    class Meta:
+        unique_together = ('event', 'name')
+
+    def __str__(self):
+        return f"{self.event_id}: {self.name}"
+
+class TagRegistrationRollup(models.Model):
+    # Registrations per (organizer, tag, week), maintained incrementally by api.rollups
+    organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tag_rollups')
+    tag = models.CharField(max_length=100)
+    week_start = models.DateField()  # Monday of the week
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('organizer', 'tag', 'week_start')
+        indexes = [
+            models.Index(fields=['organizer', 'week_start'], name='tag_rollup_week_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tag} @ {self.week_start}: {self.count}"
+
 class Wishlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wishlist')
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='wishlisted_by')
@@ -67,5 +151,62 @@ class Feedback(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     sentiment = models.CharField(max_length=50, blank=True)
 
+    def save(self, *args, **kwargs):
+        # Stored lowercase so analytics can GROUP BY the column directly
+        self.sentiment = (self.sentiment or '').strip().lower()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user.username}'s feedback on {self.event.title}"
+
+class MLJob(models.Model):
+    # Long-running ML work (retraining), queued by the API and run by `manage.py run_ml_worker`
+    RETRAIN_EVENT_PREDICTION = 'retrain_event_prediction'
+    RETRAIN_STUDENT_CLUSTERING = 'retrain_student_clustering'
+    KIND_CHOICES = [
+        (RETRAIN_EVENT_PREDICTION, 'Retrain event prediction model'),
+        (RETRAIN_STUDENT_CLUSTERING, 'Retrain student clustering model'),
+    ]
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    params = models.JSONField(default=dict, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)  # 0 to 100
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='ml_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='mljob_queue_idx'),
+        ]
+        constraints = [
+            # At most one queued/running job per kind: repeated retrain requests share it
+            models.UniqueConstraint(
+                fields=['kind'], condition=models.Q(status__in=['queued', 'running']), name='mljob_one_active_per_kind'
+            ),
+        ]
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
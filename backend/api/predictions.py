@@ -0,0 +1,54 @@
+# api/predictions.py
+# Fill an event's predicted ML fields (success_rate, expected_attendees,
+# engagement, sentiment) on the server from the in-memory event model, so
+# clients no longer have to round-trip /api/predict/ results into create calls.
+
+from ml.model import get_predictor
+
+PREDICTED_FIELDS = ('success_rate', 'expected_attendees', 'engagement', 'sentiment')
+
+
+def event_payload(event):
+    return {
+        'category': event.category,
+        'department': event.department,
+        'target_year': event.target_year,
+        'max_capacity': event.max_capacity,
+        'tags': event.tags or [],
+    }
+
+
+def predict_fields(payloads):
+    """
+    One {field: value} dict per payload (None where it could not be scored),
+    from a single batched pass over the model. Never raises: a missing or
+    broken model just means no predictions.
+    """
+    if not payloads:
+        return []
+    try:
+        results = get_predictor().predict_many(payloads)
+    except Exception as e:
+        print(f"[ML] Could not predict event fields: {e}")
+        return [None] * len(payloads)
+    return [
+        None if 'error' in result else {field: result[field] for field in PREDICTED_FIELDS}
+        for result in results
+    ]
+
+
+def fill_predictions(events, overwrite=False):
+    """
+    Set the predicted fields on Event instances (saved or not) in one pass.
+    Events that already have a success_rate are skipped unless overwrite.
+    Returns how many events were filled.
+    """
+    pending = [event for event in events if overwrite or event.success_rate is None]
+    filled = 0
+    for event, fields in zip(pending, predict_fields([event_payload(event) for event in pending])):
+        if fields is None:
+            continue
+        for name, value in fields.items():
+            setattr(event, name, value)
+        filled += 1
+    return filled
@@ -0,0 +1,141 @@
+# api/rollups.py
+# Weekly per-tag registration counts for TrendingInterestsView. Registrations
+# update the current week's bucket as they happen (see api/signals.py), so the
+# endpoint only reads a handful of pre-aggregated rows. Removals (unregistering,
+# deleting an event, dropping a tag) come off the newest buckets and never take
+# one below zero; `manage.py rebuild_tag_rollups` recomputes everything.
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest, TruncWeek
+from django.utils import timezone
+
+from .models import EventTag, TagRegistrationRollup
+
+
+def week_start(day=None):
+    day = day or timezone.localdate()
+    return day - timedelta(days=day.weekday())
+
+
+def record_registration_changes(event_deltas, day=None):
+    """
+    event_deltas maps event id -> change in registrations (+n on add, -n on
+    remove). Each tag of those events gets the delta.
+    """
+    event_deltas = {pk: delta for pk, delta in event_deltas.items() if delta}
+    if not event_deltas:
+        return
+    bucket_deltas = defaultdict(int)
+    tags = EventTag.objects.filter(event_id__in=event_deltas).values_list('event_id', 'event__organizer_id', 'name')
+    for event_id, organizer_id, tag in tags:
+        bucket_deltas[(organizer_id, tag)] += event_deltas[event_id]
+    apply_bucket_deltas(bucket_deltas, day)
+
+
+def record_tag_changes(organizer_id, added, removed, registrations, day=None):
+    """An event with `registrations` gained the `added` tags and lost the `removed` ones"""
+    if not registrations:
+        return
+    bucket_deltas = {(organizer_id, tag): registrations for tag in added}
+    bucket_deltas.update({(organizer_id, tag): -registrations for tag in removed})
+    apply_bucket_deltas(bucket_deltas, day)
+
+
+def apply_bucket_deltas(bucket_deltas, day=None):
+    """
+    {(organizer id, tag): delta}. Additions go into this week's bucket.
+    Registrations carry no timestamp, so a removal cannot know which week it
+    was counted in: it is taken off the newest buckets first, clamped at zero.
+    """
+    week = week_start(day)
+    added = {key: delta for key, delta in bucket_deltas.items() if delta > 0}
+    # Make sure the buckets exist, then apply the deltas atomically in SQL
+    TagRegistrationRollup.objects.bulk_create(
+        [TagRegistrationRollup(organizer_id=o, tag=t, week_start=week) for o, t in added],
+        ignore_conflicts=True
+    )
+    for (organizer_id, tag), delta in added.items():
+        TagRegistrationRollup.objects.filter(
+            organizer_id=organizer_id, tag=tag, week_start=week
+        ).update(count=F('count') + delta)
+
+    for (organizer_id, tag), delta in bucket_deltas.items():
+        if delta < 0:
+            _remove_registrations(organizer_id, tag, -delta, week)
+
+
+def _remove_registrations(organizer_id, tag, amount, week):
+    buckets = TagRegistrationRollup.objects.filter(
+        organizer_id=organizer_id, tag=tag, week_start__lte=week, count__gt=0
+    ).order_by('-week_start').values_list('pk', 'count')
+    for pk, count in buckets:
+        if amount <= 0:
+            break
+        take = min(count, amount)
+        TagRegistrationRollup.objects.filter(pk=pk).update(count=Greatest(F('count') - take, 0))
+        amount -= take
+
+
+def trending_interests(organizer, day=None):
+    this_week = week_start(day)
+    last_week = this_week - timedelta(days=7)
+    rows = (
+        TagRegistrationRollup.objects.filter(organizer=organizer)
+        .values('tag')
+        .annotate(
+            total=Sum('count'),
+            this_week=Sum('count', filter=Q(week_start=this_week)),
+            last_week=Sum('count', filter=Q(week_start=last_week)),
+        )
+        .order_by('-total', 'tag')
+    )
+    trending = []
+    for row in rows:
+        current, previous = row['this_week'] or 0, row['last_week'] or 0
+        if previous > 0:
+            growth_pct = round((current - previous) / previous * 100)
+            growth = f"{growth_pct:+d}%"
+        else:
+            growth_pct = None
+            growth = "new" if current > 0 else "+0%"
+        trending.append({
+            "interest": row['tag'],
+            "count": row['total'],
+            "growth": growth,
+            "growth_pct": growth_pct,
+            "this_week": current,
+            "last_week": previous,
+        })
+    return trending
+
+
+def rebuild_rollups(event_tag_model=EventTag, rollup_model=TagRegistrationRollup):
+    """
+    Recompute every bucket from the current registrations. The M2M table has no
+    timestamps, so existing registrations are attributed to the week the event
+    was created. Migration 0012 passes its historical models to backfill.
+    """
+    rows = (
+        event_tag_model.objects.annotate(week=TruncWeek('event__created_at'))
+        .values('event__organizer_id', 'name', 'week')
+        .annotate(count=Count('event__registered_users'))
+        .filter(count__gt=0)
+        .order_by()
+    )
+    buckets = [
+        rollup_model(
+            organizer_id=row['event__organizer_id'],
+            tag=row['name'],
+            week_start=timezone.localdate(row['week']) if timezone.is_aware(row['week']) else row['week'].date(),
+            count=row['count'],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        rollup_model.objects.all().delete()
+        rollup_model.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
@@ -1,6 +1,6 @@
 # api/serializers.py
 from rest_framework import serializers
-from .models import Event, Wishlist, EventSchedule, Feedback
+from .models import Event, Wishlist, EventSchedule, Feedback, MLJob
 
 class EventScheduleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -29,6 +29,15 @@ class EventSerializer(serializers.ModelSerializer):
             'created_at', 'registered_users_count', 'is_registered', 'schedule'
         ]
         read_only_fields = ['organizer', 'registered_users']
+
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset, e.g. EventSerializer(events, many=True, fields=['id', 'title'])
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def get_organizer_name(self, obj):
         # Try to get full name, fallback to username, then email
         user = getattr(obj, 'organizer', None)
@@ -79,9 +88,14 @@ class EventSerializer(serializers.ModelSerializer):
         return event
 
     def get_registered_users_count(self, obj):
+        # Annotated by Event.objects.with_list_details() on list endpoints
+        if hasattr(obj, 'registered_users_count'):
+            return obj.registered_users_count
         return obj.registered_users.count()
 
     def get_is_registered(self, obj):
+        if hasattr(obj, 'is_registered'):
+            return bool(obj.is_registered)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             
@@ -120,3 +134,35 @@ class FeedbackSerializer(serializers.ModelSerializer):
         model = Feedback
         fields = ['id', 'user', 'user_name', 'event', 'rating', 'comment', 'created_at']
         read_only_fields = ['user', 'created_at', 'event']
+
+
+class MLJobSerializer(serializers.ModelSerializer):
+    requested_by = serializers.CharField(source='requested_by.username', read_only=True, default=None)
+
+    class Meta:
+        model = MLJob
+        fields = [
+            'id', 'kind', 'status', 'progress', 'message', 'result', 'error',
+            'requested_by', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class EventImportScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventSchedule
+        fields = ['time', 'activity']
+
+
+class EventImportSerializer(serializers.ModelSerializer):
+    """One row of a bulk event import (see api/event_import.py); validation only, rows are bulk-inserted"""
+    tags = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    schedule = EventImportScheduleSerializer(many=True, required=False, default=list)
+
+    class Meta:
+        model = Event
+        fields = [
+            'title', 'description', 'date', 'time', 'location', 'category', 'target_year',
+            'department', 'max_capacity', 'tags',
+            'success_rate', 'expected_attendees', 'engagement', 'sentiment', 'schedule'
+        ]
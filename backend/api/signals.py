@@ -1,8 +1,68 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Event
+from accounts.models import User
+from .models import Event, Feedback
+from .stats import invalidate_organizer_stats
+from .rollups import record_registration_changes, record_tag_changes
 from datetime import time
+
+@receiver(post_save, sender=Event)
+def sync_event_tags(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields is not None and 'tags' not in update_fields:
+        return
+    added, removed = instance.sync_tag_index()
+    if (added or removed) and not created:
+        # Move the event's registrations to its new tags in the rollups
+        record_tag_changes(instance.organizer_id, added, removed, instance.registered_users.count())
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_stats_on_event_change(sender, instance, **kwargs):
+    invalidate_organizer_stats(instance.organizer_id)
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def invalidate_stats_on_feedback_change(sender, instance, **kwargs):
+    organizer_id = Event.objects.filter(pk=instance.event_id).values_list('organizer_id', flat=True).first()
+    invalidate_organizer_stats(organizer_id)
+
+@receiver(m2m_changed, sender=Event.registered_users.through)
+def invalidate_stats_on_registration_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_organizer_stats(instance.organizer_id)
+        return
+    # user.registered_events.add(...) / clear(): instance is the user
+    events = Event.objects.filter(pk__in=pk_set) if pk_set else instance.registered_events.all()
+    invalidate_organizer_stats(*set(events.values_list('organizer_id', flat=True)))
+
+@receiver(m2m_changed, sender=Event.registered_users.through)
+def update_tag_rollups(sender, instance, action, reverse, pk_set, **kwargs):
+    sign = {'post_add': 1, 'post_remove': -1, 'pre_clear': -1}.get(action)
+    if sign is None:
+        return
+    if action == 'pre_clear':
+        if reverse:
+            deltas = {pk: -1 for pk in instance.registered_events.values_list('pk', flat=True)}
+        else:
+            deltas = {instance.pk: -instance.registered_users.count()}
+    elif reverse:
+        deltas = {pk: sign for pk in pk_set}
+    else:
+        deltas = {instance.pk: sign * len(pk_set)}
+    record_registration_changes(deltas)
+
+@receiver(pre_delete, sender=Event)
+def remove_deleted_event_from_rollups(sender, instance, **kwargs):
+    # The registration rows go with the event by cascade, which sends no m2m_changed
+    record_registration_changes({instance.pk: -instance.registered_users.count()})
+
+@receiver(pre_delete, sender=User)
+def remove_deleted_user_from_rollups(sender, instance, **kwargs):
+    record_registration_changes({pk: -1 for pk in instance.registered_events.values_list('pk', flat=True)})
+
 @receiver(post_save, sender=Event)
 def update_actual_results(sender, instance, **kwargs):
     now = timezone.now()
@@ -42,5 +102,6 @@ def update_actual_results(sender, instance, **kwargs):
             actual_attendees=actual_attendees,
             actual_engagement=actual_engagement,
             actual_sentiment=actual_sentiment,
-            actual_success_rate=actual_success_rate
+            actual_success_rate=actual_success_rate,
+            actuals_updated_at=now
         )
\ No newline at end of file
@@ -1,3 +1,1376 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.ensemble import RandomForestRegressor
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from ml import dataset_store
+from ml import model as ml_model
+from ml import student_clustering
+from ml import train_model
+from ml.clean_data import combine_date_time, valid_date_mask
+from ml.config import django_setting
+from ml.export_students import export_student_features, iter_student_rows
+from ml.feature_engineering import build_student_features, load_student_features, save_student_features, select_columns
+from ml.forest_artifact import load_forest, save_forest
+from ml.neighbors import build_neighbor_index, benchmark_neighbor_index
+from ml.lookup_grid import build_lookup_grid, load_lookup_grid, save_lookup_grid
+from ml.model import EventSuccessPredictor
+from ml.prediction_cache import PredictionCache
+from ml.registry import LoadedArtifact, ModelRegistry, atomic_write, file_version
+from ml.train_model_students import compare_clustering_models
+from .event_import import parse_csv
+from .jobs import HANDLERS, claim_next_job, run_job
+from .models import Event, EventSchedule, EventTag, Feedback, MLJob, TagRegistrationRollup
+from .pagination import EventCursorPagination
+from .predictions import fill_predictions
+from .rollups import rebuild_rollups, trending_interests, week_start
+
+
+class EventListQueryCountTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.student = User.objects.create_user(username="stu", password="test1234", role="student")
+        self.other_students = [
+            User.objects.create_user(username=f"stu{i}", password="test1234", role="student")
+            for i in range(3)
+        ]
+
+    def create_events(self, n):
+        for i in range(n):
+            event = Event.objects.create(
+                organizer=self.organizer,
+                title=f"Event {i}",
+                date=date(2025, 1, 1 + i),
+                time=time(10, 0),
+                category="Technology",
+                max_capacity=100,
+                tags=["ai", "ml"],
+            )
+            EventSchedule.objects.create(event=event, time="10:00", activity="Intro")
+            EventSchedule.objects.create(event=event, time="11:00", activity="Talk")
+            event.registered_users.add(self.student, *self.other_students)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def assert_constant_queries(self, url):
+        self.create_events(2)
+        small, _ = self.count_queries(url)
+        self.create_events(8)
+        large, response = self.count_queries(url)
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data), 10)
+        return response
+
+    def test_public_event_list_runs_constant_queries(self):
+        self.client.force_authenticate(self.student)
+        response = self.assert_constant_queries(reverse("event-list"))
+        first = response.data[0]
+        self.assertEqual(first["registered_users_count"], 4)
+        self.assertTrue(first["is_registered"])
+        self.assertEqual(first["organizer_name"], "org")
+        self.assertEqual(len(first["schedule"]), 2)
+
+    def test_organizer_event_list_runs_constant_queries(self):
+        self.client.force_authenticate(self.organizer)
+        response = self.assert_constant_queries(reverse("organizer-event-list"))
+        self.assertFalse(response.data[0]["is_registered"])
+
+    def test_student_dashboard_runs_constant_queries(self):
+        self.client.force_authenticate(self.student)
+        response = self.assert_constant_queries(reverse("student-dashboard"))
+        # Filtering on registered_users must not shrink the count to the current user
+        self.assertEqual(response.data[0]["registered_users_count"], 4)
+
+
+class EventFeedPaginationTests(APITestCase):
+    def setUp(self):
+        organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        times = [time(9, 0), None, time(9, 0), time(18, 30), None]
+        for i in range(10):
+            Event.objects.create(
+                organizer=organizer,
+                title=f"Event {i}",
+                description="Long description",
+                date=date(2025, 3, 1 + i % 3),
+                time=times[i % len(times)],
+                category="Technology",
+                max_capacity=100,
+            )
+
+    def test_cursor_walks_every_event_once_in_feed_order(self):
+        expected = list(
+            Event.objects.order_by('-date', '-time', '-id').values_list('id', flat=True)
+        )
+        seen = []
+        url = reverse("event-list") + "?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+
+    def test_feed_index_matches_the_cursor_ordering(self):
+        index = next(i for i in Event._meta.indexes if i.name == "event_feed_idx")
+        self.assertEqual(index.fields, list(EventCursorPagination.ordering))
+
+    def test_keyset_places_null_times_like_the_backend(self):
+        # Walk the same rows as if NULL sorted first (PostgreSQL) and last (SQLite)
+        paginator = EventCursorPagination()
+        for nulls_first in (True, False):
+            time_key = F('time').desc(nulls_first=True) if nulls_first else F('time').desc(nulls_last=True)
+            ordered = list(Event.objects.order_by('-date', time_key, '-id'))
+            for i, event in enumerate(ordered):
+                rest = Event.objects.filter(paginator.after(event.date, event.time, event.pk, nulls_first))
+                self.assertEqual(list(rest.order_by('-date', time_key, '-id')), ordered[i + 1:])
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get(reverse("event-list"))
+        self.assertEqual(len(response.data), 10)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("event-list") + "?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+    def test_sparse_fieldset(self):
+        response = self.client.get(reverse("event-list") + "?page_size=2&fields=title,date")
+        self.assertEqual(set(response.data["results"][0]), {"id", "title", "date"})
+
+
+class EventFilterTests(APITestCase):
+    def setUp(self):
+        organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+
+        def create(title, category, day, tags, description=""):
+            return Event.objects.create(
+                organizer=organizer, title=title, description=description,
+                date=date(2025, 5, day), category=category, department="Computer",
+                target_year="3", max_capacity=100, tags=tags,
+            )
+
+        self.ai = create("AI Workshop", "Technology", 1, ["AI", "ml"])
+        self.cricket = create("Cricket Cup", "Sports", 10, ["cricket"], "Inter-college hackathon of bowlers")
+        self.art = create("Art Fair", "Cultural", 20, ["art", "mlops"])
+
+    def ids(self, query):
+        response = self.client.get(reverse("event-list") + query)
+        self.assertEqual(response.status_code, 200)
+        return {item["id"] for item in response.data}
+
+    def test_tags_match_whole_normalized_tags(self):
+        self.assertEqual(self.ids("?tags=ai"), {self.ai.id})
+        self.assertEqual(self.ids("?tags=ML,art"), {self.ai.id, self.art.id})
+
+    def test_tag_index_follows_updates(self):
+        self.art.tags = ["ai"]
+        self.art.save()
+        self.assertEqual(self.ids("?tags=ai"), {self.ai.id, self.art.id})
+        self.assertEqual(self.ids("?tags=mlops"), set())
+
+    def test_category_date_range_and_text(self):
+        self.assertEqual(self.ids("?category=Sports,Cultural"), {self.cricket.id, self.art.id})
+        self.assertEqual(self.ids("?date_from=2025-05-05&date_to=2025-05-15"), {self.cricket.id})
+        self.assertEqual(self.ids("?q=hackathon"), {self.cricket.id})
+
+    def test_invalid_date(self):
+        response = self.client.get(reverse("event-list") + "?date_from=yesterday")
+        self.assertEqual(response.status_code, 400)
+
+
+class InterestViewsTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.students = [
+            User.objects.create_user(username=f"stu{i}", password="test1234", role="student")
+            for i in range(3)
+        ]
+        ai = Event.objects.create(
+            organizer=self.organizer, title="AI Workshop", date=date(2025, 5, 1),
+            category="Technology", max_capacity=100, tags=["AI", "ml"],
+        )
+        mlops = Event.objects.create(
+            organizer=self.organizer, title="MLOps Talk", date=date(2025, 5, 2),
+            category="Technology", max_capacity=100, tags=["mlops", "ml"],
+        )
+        ai.registered_users.add(*self.students)
+        mlops.registered_users.add(self.students[0])
+        self.client.force_authenticate(self.organizer)
+
+    def test_trending_interests_counts_registrations_per_tag(self):
+        response = self.client.get(reverse("trending-interests"))
+        counts = {item["interest"]: item["count"] for item in response.data}
+        self.assertEqual(counts, {"ml": 4, "ai": 3, "mlops": 1})
+
+    def test_trending_growth_is_week_over_week(self):
+        this_week = week_start()
+        ai = Event.objects.get(title="AI Workshop")
+        TagRegistrationRollup.objects.filter(tag="ai").update(count=4)
+        TagRegistrationRollup.objects.create(
+            organizer=self.organizer, tag="ai", week_start=this_week - timedelta(days=7), count=2
+        )
+        ai.registered_users.remove(self.students[0])
+        response = self.client.get(reverse("trending-interests"))
+        ai_row = next(item for item in response.data if item["interest"] == "ai")
+        self.assertEqual((ai_row["this_week"], ai_row["last_week"], ai_row["count"]), (3, 2, 5))
+        self.assertEqual(ai_row["growth"], "+50%")
+
+    def test_rebuild_rollups_matches_registrations(self):
+        TagRegistrationRollup.objects.all().delete()
+        rebuild_rollups()
+        response = self.client.get(reverse("trending-interests"))
+        counts = {item["interest"]: item["count"] for item in response.data}
+        self.assertEqual(counts, {"ml": 4, "ai": 3, "mlops": 1})
+
+    def test_students_by_interest_matches_whole_tags(self):
+        response = self.client.get(reverse("students-by-interest") + "?interest=ML")
+        self.assertEqual(len(response.data), 3)
+        # Whole-tag match: only the MLOps attendee, not every "ml" registrant
+        response = self.client.get(reverse("students-by-interest") + "?interest=mlops")
+        self.assertEqual([s["username"] for s in response.data], ["stu0"])
+
+
+class TagRollupBackfillMigrationTests(TransactionTestCase):
+    """Migration 0012 fills the rollups from registrations that predate the signals"""
+
+    before = [("api", "0011_normalize_feedback_sentiment")]
+    after = [("api", "0012_tag_registration_rollup")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_existing_registrations_show_up_as_trending_interests(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old = executor.loader.project_state(self.before).apps
+        OldUser, OldEvent, OldEventTag = (old.get_model(*name) for name in
+                                          [("accounts", "User"), ("api", "Event"), ("api", "EventTag")])
+        organizer = OldUser.objects.create(username="org", role="organizer")
+        students = [OldUser.objects.create(username=f"stu{i}", role="student") for i in range(3)]
+        for title, tags, registered in (("AI Workshop", ["ai", "ml"], students), ("Data Day", ["ai"], students[:1])):
+            event = OldEvent.objects.create(organizer=organizer, title=title, date=date(2030, 5, 1),
+                                            category="Technology", max_capacity=100, tags=tags)
+            OldEventTag.objects.bulk_create([OldEventTag(event=event, name=tag) for tag in tags])
+            event.registered_users.add(*registered)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+        trending = {item["interest"]: item for item in trending_interests(organizer.pk)}
+        self.assertEqual({tag: item["count"] for tag, item in trending.items()}, {"ai": 4, "ml": 3})
+        self.assertEqual(trending["ai"]["this_week"], 4)
+
+
+class TagRollupFlowTests(APITestCase):
+    """Rollups maintained through the real register/unregister/edit/delete endpoints"""
+
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.students = [
+            User.objects.create_user(username=f"stu{i}", password="test1234", role="student")
+            for i in range(3)
+        ]
+        self.event = Event.objects.create(
+            organizer=self.organizer, title="AI Workshop", date=date(2030, 5, 1),
+            category="Technology", max_capacity=100, tags=["ai", "ml"],
+        )
+        self.other = Event.objects.create(
+            organizer=self.organizer, title="Data Day", date=date(2030, 5, 2),
+            category="Technology", max_capacity=100, tags=["data"],
+        )
+
+    def register(self, student, event):
+        self.client.force_authenticate(student)
+        response = self.client.post(reverse("event-register", kwargs={"event_id": event.pk}), {}, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def unregister(self, student, event):
+        self.client.force_authenticate(student)
+        response = self.client.post(reverse("event-unregister", kwargs={"pk": event.pk}))
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def trending(self):
+        self.client.force_authenticate(self.organizer)
+        return {item["interest"]: item for item in self.client.get(reverse("trending-interests")).data}
+
+    def assert_matches_rebuild(self):
+        counts = {tag: item["count"] for tag, item in self.trending().items() if item["count"]}
+        rebuild_rollups()
+        rebuilt = {tag: item["count"] for tag, item in self.trending().items()}
+        self.assertEqual(counts, rebuilt)
+        self.assertFalse(TagRegistrationRollup.objects.filter(count__lt=0).exists())
+
+    def test_unregistering_a_registration_from_an_earlier_week_never_goes_negative(self):
+        last_week = timezone.localdate() - timedelta(days=7)
+        with mock.patch("api.rollups.timezone.localdate", return_value=last_week):
+            self.register(self.students[0], self.event)
+        self.register(self.students[1], self.other)
+        self.unregister(self.students[0], self.event)
+
+        ai = self.trending()["ai"]
+        self.assertEqual((ai["this_week"], ai["last_week"], ai["count"]), (0, 0, 0))
+        self.assertEqual(ai["growth"], "+0%")
+        self.assert_matches_rebuild()
+
+    def test_deleting_an_event_removes_its_registrations(self):
+        for student in self.students:
+            self.register(student, self.event)
+        self.register(self.students[0], self.other)
+        self.client.force_authenticate(self.organizer)
+        response = self.client.delete(reverse("event-detail", kwargs={"pk": self.event.pk}))
+        self.assertEqual(response.status_code, 204)
+
+        counts = {tag: item["count"] for tag, item in self.trending().items()}
+        self.assertEqual(counts, {"data": 1, "ai": 0, "ml": 0})
+        self.assert_matches_rebuild()
+
+    def test_editing_tags_moves_existing_registrations(self):
+        for student in self.students[:2]:
+            self.register(student, self.event)
+        self.client.force_authenticate(self.organizer)
+        response = self.client.patch(reverse("event-detail", kwargs={"pk": self.event.pk}),
+                                     {"tags": ["ml", "robotics"]}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+
+        counts = {tag: item["count"] for tag, item in self.trending().items()}
+        self.assertEqual(counts, {"ml": 2, "robotics": 2, "ai": 0})
+        self.assert_matches_rebuild()
+
+    def test_deleting_a_student_removes_their_registrations(self):
+        self.register(self.students[0], self.event)
+        self.register(self.students[1], self.event)
+        self.students[0].delete()
+        self.assertEqual(self.trending()["ai"]["count"], 1)
+        self.assert_matches_rebuild()
+
+
+class OrganizerStatsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.students = [
+            User.objects.create_user(username=f"stu{i}", password="test1234", role="student")
+            for i in range(4)
+        ]
+        self.events = [
+            Event.objects.create(
+                organizer=self.organizer, title=f"Event {i}", date=date(2025, 5, 1 + i),
+                category="Technology", max_capacity=50, success_rate=80.0,
+            )
+            for i in range(5)
+        ]
+        for event in self.events:
+            event.registered_users.add(*self.students[:2])
+        self.client.force_authenticate(self.organizer)
+
+    def get_stats(self):
+        response = self.client.get(reverse("organizer-stats"))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_stats_use_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            stats = self.get_stats()
+        aggregate_queries = [q for q in ctx.captured_queries if 'api_' in q['sql']]
+        self.assertLessEqual(len(aggregate_queries), 3)
+        self.assertEqual(stats["total_events_created"], 5)
+        self.assertEqual(stats["total_students_reached"], 10)
+        self.assertEqual(stats["total_capacity"], 250)
+        self.assertEqual(stats["attendance_rate"], 4.0)
+
+    def test_cache_invalidated_by_registrations_and_feedback(self):
+        self.get_stats()
+        with CaptureQueriesContext(connection) as ctx:
+            self.get_stats()
+        self.assertFalse([q for q in ctx.captured_queries if 'api_' in q['sql']])
+
+        self.students[3].registered_events.add(self.events[0])
+        self.assertEqual(self.get_stats()["total_students_reached"], 11)
+
+        Feedback.objects.create(user=self.students[0], event=self.events[0], rating=2)
+        self.assertEqual(self.get_stats()["average_rating"], 2.0)
+
+
+class OrganizerSentimentAnalyticsTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        student = User.objects.create_user(username="stu", password="test1234", role="student")
+        self.events = [
+            Event.objects.create(
+                organizer=self.organizer, title=f"Event {i}", date=date(2025, 5, 1),
+                category="Technology", max_capacity=50,
+            )
+            for i in range(2)
+        ]
+        for sentiment in ["Positive", "positive", "Negative", ""]:
+            Feedback.objects.create(user=student, event=self.events[0], rating=4, sentiment=sentiment)
+        Feedback.objects.create(user=student, event=self.events[1], rating=4, sentiment="neutral")
+        self.client.force_authenticate(self.organizer)
+
+    def test_counts_are_case_insensitive(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("organizer-sentiment"))
+        self.assertEqual(len([q for q in ctx.captured_queries if 'api_feedback' in q['sql']]), 1)
+        self.assertEqual(response.data, {"positive": 40, "neutral": 40, "negative": 20})
+
+    def test_per_event_breakdown(self):
+        response = self.client.get(reverse("organizer-sentiment") + "?by_event=true")
+        events = {e["event_id"]: e for e in response.data["events"]}
+        self.assertEqual(events[self.events[0].id]["total"], 4)
+        self.assertEqual(events[self.events[0].id]["positive"], 50)
+        self.assertEqual(events[self.events[1].id]["neutral"], 100)
+
+    def test_date_range(self):
+        response = self.client.get(reverse("organizer-sentiment") + "?date_to=2000-01-01")
+        self.assertEqual(response.data, {"positive": 0, "neutral": 0, "negative": 0})
+
+
+class StudentExportTests(APITestCase):
+    def setUp(self):
+        organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.events = [
+            Event.objects.create(
+                organizer=organizer, title=f"Event {i}", date=date(2025, 1, 1 + i),
+                category="Technology", max_capacity=100, tags=["ai", f"tag{i}"],
+            )
+            for i in range(3)
+        ]
+
+    def add_students(self, n):
+        for i in range(n):
+            student = User.objects.create_user(
+                username=f"stu{User.objects.count()}", password="test1234", role="student", department="CS", year="3"
+            )
+            student.registered_events.add(*self.events[:2])
+            Feedback.objects.create(user=student, event=self.events[0], rating=4, sentiment="positive")
+
+    def export(self, chunk_size=2):
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(iter_student_rows(chunk_size=chunk_size))
+        return rows, len(ctx.captured_queries)
+
+    def test_export_streams_rows_into_the_saved_features(self):
+        self.add_students(5)
+        User.objects.create_user(username="quiet", password="test1234", role="student")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        npz, sidecar = os.path.join(tmp.name, "features.npz"), os.path.join(tmp.name, "features.json")
+        report = export_student_features(chunk_size=2, path=npz, columns_path=sidecar)
+        self.assertEqual((report["students"], report["features"]), (6, len(load_student_features(npz, sidecar).columns)))
+
+        # Same features as building from the whole table at once
+        rows, _ = self.export()
+        expected = build_student_features(pd.DataFrame(rows))
+        saved = load_student_features(npz, sidecar)
+        self.assertEqual(saved.columns, expected.columns)
+        self.assertEqual((saved.matrix != expected.matrix).nnz, 0)
+        self.assertEqual(saved.usernames[-1], "quiet")
+
+    def test_row_stream_and_dataframe_build_identical_features(self):
+        rows = make_student_rows(40, seed=3)
+        rows[0]["year"], rows[1]["department"] = 2, None
+        streamed = build_student_features(iter(rows))
+        framed = build_student_features(pd.DataFrame(rows))
+        self.assertEqual(streamed.columns, framed.columns)
+        self.assertEqual((streamed.matrix != framed.matrix).nnz, 0)
+        np.testing.assert_array_equal(streamed.user_ids, framed.user_ids)
+
+    def test_queries_grow_per_chunk_not_per_student(self):
+        self.add_students(2)
+        rows, small = self.export(chunk_size=100)
+        self.add_students(6)
+        rows, large = self.export(chunk_size=100)
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(small, large)
+
+    def test_rows_match_registrations_and_feedback(self):
+        self.add_students(3)
+        rows, _ = self.export(chunk_size=2)
+        self.assertEqual(len(rows), 3)
+        row = rows[0]
+        self.assertEqual(row["event_ids"], f"{self.events[0].id};{self.events[1].id}")
+        self.assertEqual(row["event_tags"].split(";"), ["ai", "tag0", "tag1"])
+        self.assertEqual(row["feedback_ratings"], "4")
+        self.assertEqual(row["feedback_sentiments"], "positive")
+        self.assertEqual((row["department"], row["year"]), ("CS", "3"))
+
+    def test_export_view_rebuilds_the_similarity_index(self):
+        organizer = User.objects.get(username="org")
+        self.client.force_authenticate(organizer)
+        with mock.patch("api.views.export_student_features", return_value={"students": 3}), \
+                mock.patch("api.views.rebuild_similarity_index") as rebuild:
+            rebuild.return_value.user_ids = np.arange(3)
+            response = self.client.post(reverse("export-student-features"))
+        self.assertEqual(response.status_code, 200)
+        rebuild.assert_called_once_with()
+        self.assertEqual(response.data["indexed_students"], 3)
+
+    def test_similar_students_is_unavailable_until_the_index_is_built(self):
+        self.add_students(1)
+        self.client.force_authenticate(User.objects.get(role="student"))
+        missing = os.path.join(tempfile.gettempdir(), "no-such-similarity-index.npz")
+        with mock.patch.object(student_clustering, "INDEX_PATH", missing), \
+                mock.patch.object(student_clustering, "build_similarity_index") as build:
+            response = self.client.get(reverse("similar-students"))
+        self.assertEqual(response.status_code, 503)
+        build.assert_not_called()
+
+
+def make_student_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tags = ["ai", "ml", "music", "sports", "art", "data", "robotics", "design"]
+    return [{
+        "user_id": i + 1,
+        "username": f"stu{i}",
+        "department": rng.choice(["CS", "ME", "EE"]),
+        "year": str(rng.integers(1, 5)),
+        "event_ids": "",
+        "event_tags": ";".join(rng.choice(tags, size=rng.integers(0, 5), replace=False)),
+        "feedback_ratings": "",
+        "feedback_sentiments": ";".join(rng.choice(["positive", "neutral", "negative"], size=rng.integers(0, 4))),
+    } for i in range(n)]
+
+
+class StudentFeatureStorageTests(SimpleTestCase):
+    def test_sparse_features_round_trip_and_feed_the_clustering_models(self):
+        features = build_student_features(make_student_rows(60, seed=1))
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        npz, sidecar = os.path.join(tmp.name, "features.npz"), os.path.join(tmp.name, "features.json")
+        save_student_features(features, npz, sidecar)
+        loaded = load_student_features(npz, sidecar)
+
+        self.assertEqual(loaded.matrix.format, "csr")
+        self.assertEqual(loaded.matrix.shape, features.matrix.shape)
+        self.assertEqual((loaded.matrix != features.matrix).nnz, 0)
+        self.assertEqual(loaded.columns, features.columns)
+        np.testing.assert_array_equal(loaded.user_ids, features.user_ids)
+        self.assertEqual(loaded.usernames, features.usernames)
+        self.assertIn("tag_ai", loaded.columns)
+        self.assertIn("sentiment_positive", loaded.columns)
+
+        scores, models, notes = compare_clustering_models(loaded.matrix)
+        self.assertEqual(set(scores), {"kmeans", "dbscan", "agglo"})
+        self.assertEqual(len(models["kmeans"].labels_), 60)
+        self.assertTrue(-1 <= scores["kmeans"] <= 1)
+        self.assertEqual(notes, {})
+
+    def test_agglomerative_is_bounded_to_a_sample(self):
+        matrix = build_student_features(make_student_rows(60, seed=1)).matrix
+        scores, models, notes = compare_clustering_models(matrix, agglo_max_rows=25)
+        # Agglomerative only ever saw the sampled rows
+        self.assertEqual(len(models["agglo"].labels_), 25)
+        self.assertEqual(len(models["kmeans"].labels_), 60)
+        self.assertIn("sample of 25 of 60", notes["agglo"])
+        self.assertTrue(-1 <= scores["agglo"] <= 1)
+
+
+class StudentSimilarityIndexTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.paths = {
+            "MODEL_PATH": os.path.join(tmp.name, "student_cluster_model.pkl"),
+            "FEATURES_PATH": os.path.join(tmp.name, "student_features.npz"),
+            "FEATURE_COLUMNS_PATH": os.path.join(tmp.name, "student_features.json"),
+            "FEATURE_LIST_PATH": os.path.join(tmp.name, "student_cluster_features.txt"),
+            "INDEX_PATH": os.path.join(tmp.name, "student_similarity_index.npz"),
+        }
+        self.features = build_student_features(make_student_rows(120))
+        save_student_features(self.features, self.paths["FEATURES_PATH"], self.paths["FEATURE_COLUMNS_PATH"])
+        with open(self.paths["FEATURE_LIST_PATH"], "w") as f:
+            f.write("\n".join(["user_id", "username"] + self.features.columns))
+        for name, path in self.paths.items():
+            patcher = mock.patch.object(student_clustering, name, path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(student_clustering, "load_features", return_value=self.features)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with mock.patch("builtins.print"):
+            student_clustering.train_clustering_model()
+
+    def pairwise(self, user_id, top_n):
+        # The dense computation get_similar_students did before the index
+        model = student_clustering.load_model()
+        X = select_columns(self.features, student_clustering.load_feature_list()).toarray()
+        clusters = model.predict(X)
+        row = int(np.flatnonzero(self.features.user_ids == user_id)[0])
+        others = np.flatnonzero((clusters == clusters[row]) & (self.features.user_ids != user_id))
+        dists = np.linalg.norm(X[others] - X[row], axis=1)
+        return np.sort(dists)[:top_n]
+
+    def test_top_k_matches_pairwise_distances(self):
+        index = student_clustering.load_similarity_index()
+        for user_id in (1, 17, 64, 120):
+            rows, dists = index.nearest(user_id, top_n=5)
+            np.testing.assert_allclose(dists, self.pairwise(user_id, 5), rtol=1e-5)
+            results = student_clustering.get_similar_students(user_id, top_n=5)
+            self.assertEqual([r["user_id"] for r in results], index.user_ids[rows].tolist())
+            self.assertEqual([r["similarity"] for r in results], [max(0, int(100 - d)) for d in dists])
+
+    def test_index_is_loaded_once_through_the_registry(self):
+        first = student_clustering.load_similarity_index()
+        self.assertIs(student_clustering.load_similarity_index(), first)
+        reloaded = student_clustering.StudentSimilarityIndex.load(self.paths["INDEX_PATH"])
+        np.testing.assert_array_equal(reloaded.clusters, first.clusters)
+        self.assertEqual((reloaded.features != first.features).nnz, 0)
+        self.assertEqual(reloaded.neighbors.backend, first.neighbors.backend)
+
+    def test_stale_index_is_served_without_rebuilding(self):
+        student_clustering.load_similarity_index()
+        self.assertFalse(student_clustering._index_is_stale())
+        # Features re-exported after the index was built
+        older = os.path.getmtime(self.paths["FEATURES_PATH"]) - 10
+        os.utime(self.paths["INDEX_PATH"], (older, older))
+        with mock.patch.object(student_clustering, "build_similarity_index") as build, \
+                mock.patch("builtins.print") as log:
+            index = student_clustering.load_similarity_index()
+            self.assertIs(student_clustering.load_similarity_index(), index)
+        build.assert_not_called()
+        self.assertEqual(len(index.user_ids), 120)
+        self.assertTrue(any("older than" in str(c.args[0]) for c in log.call_args_list))
+
+    def test_missing_index_is_not_built_on_read(self):
+        os.remove(self.paths["INDEX_PATH"])
+        with mock.patch.object(student_clustering, "build_similarity_index") as build:
+            with self.assertRaises(FileNotFoundError):
+                student_clustering.load_similarity_index()
+        build.assert_not_called()
+
+    def test_rebuild_on_the_write_side_picks_up_new_features(self):
+        student_clustering.load_similarity_index()
+        student_clustering.load_features.return_value = build_student_features(make_student_rows(130))
+        with mock.patch("builtins.print"):
+            student_clustering.rebuild_similarity_index()
+        self.assertEqual(len(student_clustering.load_similarity_index().user_ids), 130)
+        self.assertFalse(student_clustering._index_is_stale())
+
+    def test_rebuild_without_a_model_is_skipped(self):
+        os.remove(self.paths["MODEL_PATH"])
+        self.assertIsNone(student_clustering.rebuild_similarity_index())
+
+
+class NeighborIndexBackendTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        centers = sparse.random(5, 40, density=0.3, random_state=0).toarray() * 3
+        dense = centers[rng.integers(0, 5, 1500)] + sparse.random(1500, 40, density=0.1, random_state=1).toarray()
+        self.features = sparse.csr_matrix(dense.astype(np.float32))
+        self.clusters = rng.integers(0, 3, 1500).astype(np.int32)
+
+    def test_random_projection_recall_against_exact(self):
+        report = benchmark_neighbor_index(self.features, self.clusters, k=5, n_queries=100)
+        self.assertEqual(report["exact"]["recall_at_k"], 1.0)
+        self.assertGreaterEqual(report["random_projection"]["recall_at_k"], 0.9)
+
+        index = build_neighbor_index(self.features, self.clusters, "random_projection")
+        # Approximate: most queries re-rank a bucket, not the whole cluster
+        pruned = [len(index.candidates(row)) < len(index.cluster_members(row)) for row in range(0, 1500, 15)]
+        self.assertGreater(np.mean(pruned), 0.5)
+
+    def test_backend_setting_is_respected(self):
+        for setting, expected in (("exact", "exact"), ("random_projection", "random_projection"), ("auto", "exact")):
+            with override_settings(STUDENT_SIMILARITY_BACKEND=setting):
+                self.assertEqual(build_neighbor_index(self.features, self.clusters).backend, expected)
+        with override_settings(STUDENT_SIMILARITY_BACKEND="auto"), \
+                mock.patch("ml.neighbors.AUTO_EXACT_MAX_STUDENTS", 1000):
+            self.assertEqual(build_neighbor_index(self.features, self.clusters).backend, "random_projection")
+        # An explicit backend wins over the setting
+        with override_settings(STUDENT_SIMILARITY_BACKEND="random_projection"):
+            self.assertEqual(build_neighbor_index(self.features, self.clusters, "exact").backend, "exact")
+        with override_settings(STUDENT_SIMILARITY_BACKEND="faiss"), self.assertRaises(ValueError):
+            build_neighbor_index(self.features, self.clusters)
+
+
+class MLJobQueueTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.client.force_authenticate(self.organizer)
+
+    def test_retrain_returns_202_and_dedupes_active_job(self):
+        first = self.client.post(reverse("retrain-event-prediction"))
+        second = self.client.post(reverse("retrain-event-prediction"))
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 202)
+        self.assertEqual(first.data["job"]["id"], second.data["job"]["id"])
+        self.assertEqual(first.data["job"]["status"], "queued")
+        self.assertEqual(MLJob.objects.count(), 1)
+
+        other = self.client.post(reverse("retrain-student-clustering"))
+        self.assertNotEqual(other.data["job"]["id"], first.data["job"]["id"])
+
+    def test_worker_runs_job_and_reports_progress(self):
+        job_id = self.client.post(reverse("retrain-event-prediction")).data["job"]["id"]
+
+        def handler(job, report):
+            report(40, "Halfway")
+            self.assertEqual(MLJob.objects.get(pk=job.pk).progress, 40)
+            return {"model_version": "abc"}
+
+        with mock.patch.dict(HANDLERS, {MLJob.RETRAIN_EVENT_PREDICTION: handler}):
+            job = claim_next_job()
+            self.assertEqual(job.pk, job_id)
+            self.assertIsNone(claim_next_job())
+            run_job(job)
+
+        response = self.client.get(reverse("ml-job-detail", args=[job_id]))
+        self.assertEqual(response.data["status"], "succeeded")
+        self.assertEqual(response.data["progress"], 100)
+        self.assertEqual(response.data["result"], {"model_version": "abc"})
+
+        # Finished jobs no longer block a new request
+        again = self.client.post(reverse("retrain-event-prediction"))
+        self.assertNotEqual(again.data["job"]["id"], job_id)
+
+    def test_failed_job_records_error(self):
+        self.client.post(reverse("retrain-student-clustering"))
+
+        def handler(job, report):
+            raise RuntimeError("no features")
+
+        with mock.patch.dict(HANDLERS, {MLJob.RETRAIN_STUDENT_CLUSTERING: handler}):
+            run_job(claim_next_job())
+
+        jobs = self.client.get(reverse("ml-job-list"), {"status": "failed"}).data
+        self.assertEqual(len(jobs), 1)
+        self.assertIn("no features", jobs[0]["error"])
+
+
+class ExportCompletedEventsTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.student = User.objects.create_user(username="stu", password="test1234", role="student")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dataset = os.path.join(tmp.name, "event_dataset.csv")
+        with open(self.dataset, "w") as f:
+            f.write("event_title,category,department,target_year,capacity,location,date,time,event_tags,success_rate\n")
+            f.write('Legacy Event,Technology,Computer,3,100,Hall,2024-09-15,10:00,"ai, ml",85.0\n')
+
+    def past_event(self, title):
+        event = Event.objects.create(
+            organizer=self.organizer, title=title, date=date(2024, 1, 10), time=time(10, 0),
+            category="Technology", max_capacity=10, tags=["ai"],
+        )
+        event.registered_users.add(self.student)
+        event.save()  # past event: update_actual_results fills the actuals
+        return event
+
+    def export(self):
+        call_command("export_completed_events", dataset=self.dataset, stdout=io.StringIO())
+        with open(self.dataset, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def test_only_new_completions_are_exported(self):
+        first = self.past_event("First")
+        rows = self.export()
+        self.assertEqual([r["event_title"] for r in rows], ["Legacy Event", "First"])
+        self.assertEqual(rows[1]["event_id"], str(first.id))
+        self.assertEqual(rows[1]["success_rate"], "10.0")
+
+        # Nothing new: the file is left alone
+        self.assertEqual(len(self.export()), 2)
+
+        self.past_event("Second")
+        self.assertEqual([r["event_title"] for r in self.export()], ["Legacy Event", "First", "Second"])
+
+    def test_recomputed_actuals_replace_the_row(self):
+        event = self.past_event("First")
+        self.export()
+        Event.objects.filter(pk=event.pk).update(actual_success_rate=50.0, actuals_updated_at=timezone.now())
+        rows = self.export()
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]["actual_success_rate"], "50.0")
+
+
+class EventDatasetSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        source = os.path.join(os.path.dirname(dataset_store.__file__), "data", "event_dataset.csv")
+        self.dataset = shutil.copy(source, os.path.join(tmp.name, "event_dataset.csv"))
+        # clean_event_dataset writes cleaned_metadata.json to the working directory
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def load(self):
+        with mock.patch("sys.stdout", new_callable=io.StringIO):
+            return dataset_store.load_clean_event_dataset(self.dataset)
+
+    def test_snapshot_round_trips_and_skips_cleaning(self):
+        cleaned = self.load()
+        with mock.patch.object(dataset_store, "clean_event_dataset") as clean:
+            cached = self.load()
+        clean.assert_not_called()
+        pd.testing.assert_frame_equal(cached, cleaned)
+
+    def test_changed_source_is_cleaned_again(self):
+        before = self.load()
+        with open(self.dataset, "a") as f:
+            f.write('\nNew Workshop,Technology,Computer,3,100,Hall,2025-03-01,10:00,"ai, ml",80.0,,,,')
+        after = self.load()
+        self.assertEqual(len(after), len(before) + 1)
+
+
+def write_event_dataset(path, ids, mode="w"):
+    categories = ["Technology", "Cultural", "Sports", "Academic"]
+    departments = ["Computer", "Management", "Science"]
+    with open(path, mode, newline="") as f:
+        writer = csv.writer(f)
+        if mode == "w":
+            writer.writerow(["event_title", "category", "department", "target_year", "capacity", "location",
+                             "date", "time", "event_tags", "success_rate", "event_id"])
+        for i in ids:
+            writer.writerow([f"Event {i}", categories[i % 4], departments[i % 3], 1 + i % 4, 50 + 7 * i,
+                             "Hall", f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "10:00", "ai, ml",
+                             40 + (i * 13) % 55, i])
+
+
+class FitEventModelTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        os.makedirs(os.path.join(self.dir, "data"))
+        self.dataset = os.path.join(self.dir, "data", "event_dataset.csv")
+        write_event_dataset(self.dataset, range(40))
+        self.reports = os.path.join(self.dir, "reports.jsonl")
+        # clean_event_dataset writes cleaned_metadata.json to the working directory
+        cwd = os.getcwd()
+        os.chdir(self.dir)
+        self.addCleanup(os.chdir, cwd)
+        for name, value in [("ML_DIR", self.dir), ("FOREST_PATH", os.path.join(self.dir, "model.forest")),
+                            ("REPORTS_PATH", self.reports),
+                            ("refresh_event_model", mock.Mock(return_value=LoadedArtifact(None, "test", None))),
+                            ("get_event_model", mock.Mock(return_value=LoadedArtifact(None, "served", None)))]:
+            patcher = mock.patch.object(train_model, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fit(self, **options):
+        with mock.patch("sys.stdout", new_callable=io.StringIO):
+            _, report = train_model.fit_event_model(n_jobs=1, lookup_grid=False, **options)
+        with open(os.path.join(self.dir, "model.pkl"), "rb") as f:
+            return report, pickle.load(f)
+
+    @staticmethod
+    def tree_rows(model):
+        # Bootstrap weights sum to the number of rows each tree was fitted on
+        return [int(tree.tree_.weighted_n_node_samples[0]) for tree in model.estimators_]
+
+    def test_full_fit_reports_holdout_and_serves_all_rows(self):
+        report, saved = self.fit()
+        self.assertEqual((report["mode"], report["rows"], report["fit_rows"], report["holdout_rows"]),
+                         ("full", 40, 40, 8))
+        self.assertIsNotNone(report["r2"])
+        self.assertIsNotNone(report["mae"])
+        self.assertEqual(report["artifact_bytes"], os.path.getsize(os.path.join(self.dir, "model.pkl")))
+        self.assertEqual(set(self.tree_rows(saved["model"])), {40})
+        self.assertEqual(len(saved["trained_keys"]), 40)
+        self.assertEqual(train_model.load_training_reports(self.reports), [report])
+
+    def test_warm_start_adds_trees_for_rows_not_yet_trained(self):
+        self.fit()
+        # New events anywhere in the file, not just appended at the end
+        with open(self.dataset) as f:
+            header, *rows = f.read().splitlines(keepends=True)
+        write_event_dataset(self.dataset, range(40, 50))
+        with open(self.dataset) as f:
+            new_rows = f.read().splitlines(keepends=True)[1:]
+        with open(self.dataset, "w") as f:
+            f.writelines([header] + new_rows[:5] + rows + new_rows[5:])
+
+        report, saved = self.fit(warm_start=True, new_trees=5)
+        self.assertEqual((report["mode"], report["rows"], report["fit_rows"], report["n_estimators"]),
+                         ("warm_start", 50, 10, 105))
+        self.assertEqual(saved["model"].n_estimators, 105)
+        self.assertEqual(self.tree_rows(saved["model"])[100:], [10] * 5)
+        self.assertEqual(len(saved["trained_keys"]), 50)
+
+    def test_warm_start_without_new_rows_records_a_noop(self):
+        self.fit()
+        report, saved = self.fit(warm_start=True)
+        self.assertEqual((report["mode"], report["rows"], report["fit_rows"]), ("noop", 0, 0))
+        # Nothing new on disk: the served model is reported, not reloaded
+        self.assertEqual(report["model_version"], "served")
+        train_model.refresh_event_model.assert_called_once_with()
+        self.assertEqual(report["n_estimators"], 100)
+        self.assertEqual(report["artifact_bytes"], os.path.getsize(os.path.join(self.dir, "model.pkl")))
+        self.assertEqual([r["mode"] for r in train_model.load_training_reports(self.reports)], ["full", "noop"])
+
+
+class CleanEventDatasetVectorizationTests(SimpleTestCase):
+    """The column-level date transforms must match the row-wise code they replaced"""
+
+    def setUp(self):
+        path = os.path.join(os.path.dirname(dataset_store.__file__), "data", "event_dataset.csv")
+        self.raw = pd.read_csv(path, quotechar='"', skipinitialspace=True)
+
+    @staticmethod
+    def rowwise_is_valid_date(date_str):
+        dt = pd.to_datetime(date_str, errors="coerce")
+        return not pd.isnull(dt) and 1900 <= dt.year <= 2100
+
+    def test_valid_date_mask_matches_rowwise(self):
+        dates = pd.concat([
+            self.raw["date"],
+            pd.Series(["2024/01/05", "garbage", None, "2101-01-01", "1899-12-31", "2024-02-30", "March 3 2025"]),
+        ], ignore_index=True)
+        mask, _ = valid_date_mask(dates)
+        expected = dates.apply(self.rowwise_is_valid_date)
+        self.assertEqual(mask.tolist(), expected.tolist())
+        self.assertFalse(mask.all())  # the dataset has an out-of-range date
+
+    def test_combine_matches_rowwise(self):
+        df = self.raw[valid_date_mask(self.raw["date"])[0]]
+        dates = pd.to_datetime(df["date"], errors="coerce", format="%Y-%m-%d")
+        times = pd.to_datetime(df["time"], format="%H:%M", errors="coerce")
+        times = times.fillna(times.mode()[0])
+        expected = pd.DataFrame({"date": dates, "time": times.dt.time}).apply(
+            lambda row: datetime.combine(row["date"], row["time"]), axis=1
+        )
+        pd.testing.assert_series_equal(combine_date_time(dates, times), expected)
+
+
+class DjangoSettingTests(SimpleTestCase):
+    class Unconfigured:
+        def __getattr__(self, name):
+            raise ImproperlyConfigured(name)
+
+    @override_settings(EVENT_PREDICTION_CACHE_SIZE=5)
+    def test_reads_django_settings(self):
+        self.assertEqual(django_setting("EVENT_PREDICTION_CACHE_SIZE", 2048), 5)
+        self.assertEqual(django_setting("NOT_A_SETTING", "auto"), "auto")
+
+    def test_falls_back_to_the_environment_outside_django(self):
+        env = {"EVENT_PREDICTION_CACHE_SIZE": "64", "EVENT_PREDICTION_LOOKUP_GRID": "Yes", "EVENT_MODEL_FORMAT": "pickle"}
+        with mock.patch("django.conf.settings", self.Unconfigured()), mock.patch.dict(os.environ, env):
+            self.assertEqual(django_setting("EVENT_PREDICTION_CACHE_SIZE", 2048), 64)
+            self.assertIs(django_setting("EVENT_PREDICTION_LOOKUP_GRID", False), True)
+            self.assertEqual(django_setting("EVENT_MODEL_FORMAT", "forest"), "pickle")
+            self.assertEqual(django_setting("EVENT_PREDICTION_CACHE_TTL", 600), 600)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.path = os.path.join(self.dir, "model.pkl")
+
+    def write(self, data, mtime_ns=None):
+        atomic_write(self.path, lambda f: pickle.dump(data, f))
+        if mtime_ns is not None:
+            # Two writes inside one timestamp tick must still look different
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_reloads_only_when_the_stamp_changes(self):
+        self.write({"trees": 1}, mtime_ns=10**18)
+        loader = mock.Mock(wraps=lambda path: pd.read_pickle(path))
+        registry = ModelRegistry(self.path, loader=loader)
+        with mock.patch("builtins.print"):
+            held = registry.get()
+            old_version = held.version
+            self.assertIs(registry.get(), held)
+            self.assertEqual(loader.call_count, 1)
+
+            self.write({"trees": 2}, mtime_ns=10**18 + 1)
+            swapped = registry.get()
+        self.assertEqual(loader.call_count, 2)
+        self.assertEqual(swapped.data, {"trees": 2})
+        self.assertNotEqual(swapped.version, held.version)
+        self.assertEqual(registry.version, swapped.version)
+        # A caller that already held the old artifact keeps using it unchanged
+        self.assertEqual((held.data, held.version), ({"trees": 1}, old_version))
+
+    def test_same_size_rewrite_is_picked_up_by_mtime(self):
+        self.write({"trees": 1}, mtime_ns=10**18)
+        registry = ModelRegistry(self.path)
+        with mock.patch("builtins.print"):
+            first = registry.get()
+            self.write({"trees": 3}, mtime_ns=10**18 + 5)
+            self.assertEqual(os.path.getsize(self.path), first.stamp[1])
+            self.assertEqual(registry.get().data, {"trees": 3})
+
+    def test_file_version_follows_the_content(self):
+        self.write({"trees": 1})
+        first = file_version(self.path)
+        self.write({"trees": 1}, mtime_ns=10**18)
+        self.assertEqual(file_version(self.path), first)
+        self.write({"trees": 2})
+        self.assertNotEqual(file_version(self.path), first)
+        self.assertEqual(len(first), 12)
+
+    def test_atomic_write_leaves_no_partial_or_temp_file(self):
+        self.write({"trees": 1})
+
+        def broken(f):
+            f.write(b"half a pickle")
+            raise RuntimeError("disk full")
+
+        with self.assertRaises(RuntimeError):
+            atomic_write(self.path, broken)
+        self.assertEqual(os.listdir(self.dir), ["model.pkl"])
+        with open(self.path, "rb") as f:
+            self.assertEqual(pickle.load(f), {"trees": 1})
+
+        with self.assertRaises(RuntimeError):
+            atomic_write(os.path.join(self.dir, "new.pkl"), broken)
+        self.assertEqual(os.listdir(self.dir), ["model.pkl"])
+
+
+class ForestArtifactTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        X = rng.integers(0, 8, size=(300, 5)).astype(float)
+        X[::7, 0] = np.nan  # unknown categories are NaN at training time
+        y = X[:, 3] * 3 + np.nan_to_num(X[:, 0]) + rng.normal(0, 1, 300)
+        self.forest = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+        self.X = rng.integers(0, 9, size=(200, 5)).astype(float)
+        self.X[::5, 0] = np.nan
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "model.forest")
+
+    def test_memory_mapped_forest_matches_sklearn(self):
+        save_forest(self.path, self.forest, {"category_map": {"Technology": 0}})
+        flat, meta = load_forest(self.path)
+        self.assertEqual(meta, {"category_map": {"Technology": 0}})
+        self.assertIsInstance(flat.value, np.memmap)
+
+        per_tree = np.stack([tree.predict(self.X.astype(np.float32)) for tree in self.forest.estimators_], axis=1)
+        np.testing.assert_array_equal(flat.predict_per_tree(self.X), per_tree)
+        np.testing.assert_allclose(flat.predict(self.X), self.forest.predict(self.X), rtol=0, atol=1e-9)
+
+
+class EventSuccessPredictorTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        X = rng.integers(0, 6, size=(200, 5)).astype(float)
+        y = np.clip(30 + X[:, 3] * 10 + rng.normal(0, 5, 200), 30, 99)
+        self.forest = RandomForestRegressor(n_estimators=15, random_state=0).fit(X, y)
+        self.model_data = {
+            "category_map": {"Technology": 1},
+            "department_map": {"Computer": 2},
+            "year_map": {"3": 2},
+        }
+        self.payload = {"category": "technology", "department": "Computer", "target_year": 3,
+                        "max_capacity": "4", "tags": ["ai", "ml"]}
+
+    def test_interval_and_stability_come_from_the_per_tree_spread(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "model.forest")
+        save_forest(path, self.forest, {})
+        flat, _ = load_forest(path)
+
+        per_tree = np.stack([tree.predict(np.array([[1, 2, 2, 4, 2]], dtype=np.float32))
+                             for tree in self.forest.estimators_], axis=1)
+        mean, std = per_tree.mean(), per_tree.std()
+        for model in (self.forest, flat):
+            predictor = EventSuccessPredictor({"model": model, **self.model_data}, "v1")
+            prediction = predictor.predict(self.payload)
+            self.assertEqual(prediction["success_rate"], round(mean))
+            self.assertEqual(prediction["confidence_interval"],
+                             [round(max(30, mean - 1.96 * std), 1), round(min(99, mean + 1.96 * std), 1)])
+            self.assertAlmostEqual(prediction["stability"], round(1 - std / mean, 3))
+            self.assertEqual(prediction["model_version"], "v1")
+
+    def test_batch_matches_single_predictions_and_reports_bad_rows(self):
+        predictor = EventSuccessPredictor({"model": self.forest, **self.model_data}, "v1")
+        results = predictor.predict_many([self.payload, {"category": "Cultural"}, "nope"])
+        self.assertEqual(results[0], {"index": 0, **predictor.predict(self.payload)})
+        self.assertEqual(results[1], {"index": 1, "error": "Missing required field: department"})
+        self.assertEqual(results[2], {"index": 2, "error": "Each event must be an object."})
+        self.assertEqual(predictor.explain_prediction()[0][0], "capacity")
+
+    def test_single_prediction_raises_the_original_error(self):
+        predictor = EventSuccessPredictor({"model": self.forest, **self.model_data}, "v1")
+        with self.assertRaises(KeyError) as ctx:
+            predictor.predict({"category": "Cultural"})
+        self.assertEqual(ctx.exception.args, ("department",))
+        with self.assertRaisesMessage(ValueError, "invalid literal for int()"):
+            predictor.predict({**self.payload, "max_capacity": "lots"})
+        with self.assertRaises(TypeError):
+            predictor.predict({**self.payload, "max_capacity": None})
+
+
+class PredictionCacheTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        X = rng.integers(0, 6, size=(100, 5)).astype(float)
+        self.forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, 40 + X[:, 3] * 5)
+        self.model_data = {"model": self.forest, "category_map": {}, "department_map": {}, "year_map": {}}
+        self.payload = {"category": "Technology", "department": "Computer", "target_year": 2, "max_capacity": 3}
+
+    def test_repeated_rows_skip_the_forest(self):
+        cache = PredictionCache(maxsize=10, ttl=60)
+        predictor = EventSuccessPredictor(self.model_data, "v1", cache)
+        other = {**self.payload, "max_capacity": 5}
+        with mock.patch.object(predictor, "predict_per_tree", wraps=predictor.predict_per_tree) as per_tree:
+            first = predictor.predict(self.payload)
+            self.assertEqual(predictor.predict(self.payload), first)
+            batch = predictor.predict_many([self.payload, other])
+        self.assertEqual(batch[0], {"index": 0, **first})
+        # Only the two distinct rows were scored, each once
+        self.assertEqual([len(c.args[0]) for c in per_tree.call_args_list], [1, 1])
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 2)
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+    def test_entries_expire_and_least_recently_used_is_evicted(self):
+        now = [0.0]
+        cache = PredictionCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)  # evicts "b", the least recently used
+        self.assertIsNone(cache.get("b"))
+        now[0] = 11
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_swapping_the_model_clears_the_cache(self):
+        cache = PredictionCache(maxsize=10, ttl=60)
+        artifacts = [LoadedArtifact(self.model_data, "v1", (1, 1)), LoadedArtifact(self.model_data, "v2", (2, 2))]
+        with mock.patch.object(ml_model, "_predictor", None), \
+                mock.patch.object(ml_model, "get_prediction_cache", return_value=cache), \
+                mock.patch.object(ml_model, "get_event_model", side_effect=[artifacts[0], artifacts[0], artifacts[1]]):
+            ml_model.get_predictor().predict(self.payload)
+            ml_model.get_predictor().predict(self.payload)
+            self.assertEqual(cache.stats()["size"], 1)
+            prediction = ml_model.get_predictor().predict(self.payload)
+        self.assertEqual(prediction["model_version"], "v2")
+        self.assertEqual(cache.stats()["invalidations"], 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+class LookupGridTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        X = np.column_stack([rng.integers(0, 2, 300), rng.integers(0, 2, 300), rng.integers(0, 2, 300),
+                             rng.integers(40, 200, 300), rng.integers(0, 3, 300)]).astype(float)
+        forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, 30 + X[:, 3] / 4 + X[:, 4])
+        self.predictor = EventSuccessPredictor({"model": forest})
+        capacities = np.array([40.0, 120.0, 200.0])
+        self.grid = build_lookup_grid(self.predictor.predict_with_confidence, 2, 2, 2, capacities, 2, "run1")
+
+    def test_knots_are_exact_and_capacity_is_interpolated(self):
+        X = np.array([[1, 0, 1, 120, 2], [1, 0, 1, 200, 2], [1, 0, 1, 160, 2]], dtype=float)
+        scores, inside = self.grid.lookup(X)
+        self.assertTrue(inside.all())
+        expected = np.column_stack(self.predictor.predict_with_confidence(X[:2]))
+        np.testing.assert_allclose(scores[:2], expected, rtol=1e-6)
+        np.testing.assert_allclose(scores[2], expected.mean(axis=0), rtol=1e-6)
+
+    def test_rows_outside_the_grid_fall_back_to_the_model(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "model.grid.npz")
+        save_lookup_grid(path, self.grid)
+        grid = load_lookup_grid(path)
+        self.assertEqual(grid.model_id, "run1")
+
+        served = EventSuccessPredictor(self.predictor.model_data, grid=grid)
+        # capacity above the last knot, a tag count the grid has no column for, and one row inside it
+        X = np.array([[0, 1, 0, 500, 1], [0, 1, 0, 100, 7], [0, 1, 0, 200, 1]], dtype=float)
+        self.assertEqual(grid.lookup(X)[1].tolist(), [False, False, True])
+        np.testing.assert_allclose(np.column_stack(served.score(X)),
+                                   np.column_stack(self.predictor.predict_with_confidence(X)), rtol=1e-6)
+
+
+def make_test_predictor():
+    rng = np.random.default_rng(4)
+    X = rng.integers(0, 4, size=(100, 5)).astype(float)
+    X[:, 3] = rng.integers(20, 200, 100)
+    forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, 30 + X[:, 3] / 4)
+    return EventSuccessPredictor({"model": forest, "category_map": {"Technology": 0},
+                                  "department_map": {"Computer": 0}, "year_map": {"3": 2}}, "v1")
+
+
+class BatchPredictEventTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.client.force_authenticate(self.organizer)
+        patcher = mock.patch("api.views.get_predictor", return_value=make_test_predictor())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.event = {"category": "Technology", "department": "Computer", "target_year": "3",
+                      "max_capacity": 90, "tags": ["ai"]}
+
+    def test_batch_results_match_single_predictions(self):
+        events = [self.event, {**self.event, "max_capacity": 150}]
+        response = self.client.post(reverse("predict-event-success-batch"), {"events": events}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["count"], response.data["failed"]), (2, 0))
+        for i, event in enumerate(events):
+            single = self.client.post(reverse("predict-event-success"), event, format="json")
+            self.assertEqual(response.data["results"][i], {"index": i, **single.data})
+
+    def test_bad_rows_get_their_own_error_entries(self):
+        events = [{"department": "Computer"}, self.event, "nope", {**self.event, "max_capacity": "many"}]
+        response = self.client.post(reverse("predict-event-success-batch"), events, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["failed"], 3)
+        results = response.data["results"]
+        self.assertEqual([r["index"] for r in results], [0, 1, 2, 3])
+        self.assertEqual(results[0]["error"], "Missing required field: category")
+        self.assertIn("success_rate", results[1])
+        self.assertEqual(results[2]["error"], "Each event must be an object.")
+        self.assertIn("error", results[3])
+
+    def test_batches_over_the_limit_are_rejected(self):
+        url = reverse("predict-event-success-batch")
+        too_many = self.client.post(url, {"events": [self.event] * 501}, format="json")
+        self.assertEqual(too_many.status_code, 400)
+        self.assertIn("500", too_many.data["error"])
+        self.assertEqual(self.client.post(url, {"events": [self.event] * 500}, format="json").status_code, 200)
+        self.assertEqual(self.client.post(url, {"events": []}, format="json").status_code, 400)
+
+
+class ServerSidePredictionTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.client.force_authenticate(self.organizer)
+        self.predictor = make_test_predictor()
+        patcher = mock.patch("api.predictions.get_predictor", return_value=self.predictor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.form = {
+            "title": "ML Night", "date": "2030-05-01", "time": "18:00", "category": "Technology",
+            "department": "Computer", "target_year": "3", "max_capacity": 120, "tags": ["ai", "ml"],
+            "schedule[0][time]": "18:00", "schedule[0][activity]": "Talks",
+        }
+        self.expected = self.predictor.predict({**self.form, "max_capacity": "120"})
+
+    def test_create_fills_missing_predictions_with_the_event(self):
+        response = self.client.post(reverse("event-create"), self.form, format="multipart")
+        self.assertEqual(response.status_code, 201, response.data)
+        event = Event.objects.get(pk=response.data["id"])
+        self.assertEqual(event.success_rate, self.expected["success_rate"])
+        self.assertEqual(event.expected_attendees, self.expected["expected_attendees"])
+        self.assertEqual(event.sentiment, self.expected["sentiment"])
+        self.assertEqual(event.schedule.count(), 1)
+
+    def test_client_predictions_are_kept_unless_predict_is_requested(self):
+        form = {**self.form, "success_rate": 12, "expected_attendees": 3, "engagement": 17, "sentiment": "Negative"}
+        kept = self.client.post(reverse("event-create"), form, format="multipart")
+        self.assertEqual(kept.data["success_rate"], 12)
+        scored = self.client.post(reverse("event-create") + "?predict=true", form, format="multipart")
+        self.assertEqual(scored.data["success_rate"], self.expected["success_rate"])
+
+    def test_fill_predictions_scores_events_in_one_pass(self):
+        events = [Event(organizer=self.organizer, title=f"E{i}", date=date(2030, 1, 1), category="Technology",
+                        department="Computer", target_year="3", max_capacity=50 + i * 30, tags=["x"])
+                  for i in range(4)]
+        events[0].success_rate = 10
+        with mock.patch.object(self.predictor, "predict_many", wraps=self.predictor.predict_many) as batch:
+            self.assertEqual(fill_predictions(events), 3)
+        batch.assert_called_once()
+        self.assertEqual(events[0].success_rate, 10)
+        self.assertTrue(all(e.expected_attendees is not None for e in events[1:]))
+
+
+class EventImportTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="org", password="test1234", role="organizer")
+        self.client.force_authenticate(self.organizer)
+        patcher = mock.patch("api.predictions.get_predictor", return_value=make_test_predictor())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def event(self, i, **extra):
+        return {"title": f"Session {i}", "date": "2030-09-01", "time": "10:00", "category": "Technology",
+                "department": "Computer", "target_year": "3", "max_capacity": 40 + i, "tags": ["AI", "ai", "ml"],
+                "schedule": [{"time": "10:00", "activity": "Intro"}, {"time": "11:00", "activity": "Lab"}], **extra}
+
+    def test_valid_rows_are_created_and_invalid_rows_reported(self):
+        rows = [self.event(1), self.event(2, success_rate=55), {"title": "No date", "category": "Sports"}]
+        response = self.client.post(reverse("event-import"), {"events": rows}, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data["created"], response.data["failed"], response.data["schedules"]), (2, 1, 4))
+        self.assertEqual(response.data["errors"][0]["row"], 3)
+        self.assertIn("date", response.data["errors"][0]["errors"])
+        self.assertEqual(response.data["predicted"], 1)
+
+        events = Event.objects.filter(pk__in=response.data["ids"]).order_by("pk")
+        self.assertEqual([e.organizer_id for e in events], [self.organizer.pk] * 2)
+        self.assertEqual(events[1].success_rate, 55)
+        self.assertIsNotNone(events[0].expected_attendees)
+        self.assertEqual(list(events[0].schedule.order_by("time").values_list("activity", flat=True)), ["Intro", "Lab"])
+        self.assertEqual(set(EventTag.objects.filter(event=events[0]).values_list("name", flat=True)), {"ai", "ml"})
+
+    def test_insert_queries_do_not_grow_with_rows(self):
+        counts = []
+        for n in (2, 20):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(reverse("event-import"), [self.event(i) for i in range(n)], format="json")
+            self.assertEqual(response.data["created"], n)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_dry_run_validates_without_predicting(self):
+        with mock.patch("api.event_import.fill_predictions") as fill:
+            response = self.client.post(reverse("event-import") + "?dry_run=true",
+                                        [self.event(1), self.event(2)], format="json")
+        fill.assert_not_called()
+        self.assertEqual((response.data["valid"], response.data["created"], response.data["predicted"]), (2, 0, 0))
+        self.assertFalse(Event.objects.exists())
+
+    def test_strict_csv_import_writes_nothing_when_a_row_fails(self):
+        csv_text = (
+            "title,date,time,category,department,target_year,max_capacity,tags,schedule\n"
+            "Kickoff,2030-09-01,09:00,Technology,Computer,3,80,\"ai, ml\",09:00=Welcome; 09:30=Keynote\n"
+            "Broken,not-a-date,09:00,Sports,Civil,1,abc,,\n"
+        )
+        self.assertEqual(parse_csv(csv_text)[0]["schedule"][1], {"time": "09:30", "activity": "Keynote"})
+        upload = SimpleUploadedFile("semester.csv", csv_text.encode(), content_type="text/csv")
+        response = self.client.post(reverse("event-import") + "?strict=true", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((response.data["valid"], response.data["predicted"]), (1, 0))
+        self.assertEqual(set(response.data["errors"][0]["errors"]), {"date", "max_capacity"})
+        self.assertFalse(Event.objects.exists())
+
+        call_command("import_events", self.write_temp(csv_text), organizer="org", stdout=io.StringIO())
+        self.assertEqual(list(Event.objects.values_list("title", flat=True)), ["Kickoff"])
+
+    def write_temp(self, text):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "semester.csv")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
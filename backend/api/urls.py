@@ -3,7 +3,10 @@ from django.urls import path
 from .views import (
     ContactAPIView,
     PredictEventView,
+    BatchPredictEventView,
+    PredictionCacheStatsView,
     EventCreateView,
+    EventImportView,
     EventListView,
     OrganizerEventListView,
     OrganizerStatsView,
@@ -20,6 +23,8 @@ from .views import (
     RetrainEventPredictionModelView,
     RetrainStudentClusteringModelView,
     ExportStudentFeaturesView,
+    MLJobListView,
+    MLJobDetailView,
 
 )
 
@@ -27,10 +32,13 @@ urlpatterns = [
     path("contact/", ContactAPIView.as_view(), name="contact"),
     # 🎯 ML Prediction
     path("predict/", PredictEventView.as_view(), name="predict-event-success"),
+    path("predict/batch/", BatchPredictEventView.as_view(), name="predict-event-success-batch"),
+    path("predict/cache/", PredictionCacheStatsView.as_view(), name="predict-cache-stats"),
 
     # 🛠️ Event CRUD
     path("events/", EventListView.as_view(), name="event-list"),  # Public GET
     path("events/create/", EventCreateView.as_view(), name="event-create"),  # Authenticated POST
+    path("events/import/", EventImportView.as_view(), name="event-import"),
     path("events/<int:pk>/", EventDetailView.as_view(), name="event-detail"),
     path("events/<int:event_id>/register/", RegisterEventView.as_view(), name="event-register"),
 
@@ -61,5 +69,7 @@ urlpatterns = [
     path('ml/retrain/predict/', RetrainEventPredictionModelView.as_view(), name='retrain-event-prediction'),
     path('ml/retrain/clustering/', RetrainStudentClusteringModelView.as_view(), name='retrain-student-clustering'),
     path('ml/export/student-features/', ExportStudentFeaturesView.as_view(), name='export-student-features'),
+    path('ml/jobs/', MLJobListView.as_view(), name='ml-job-list'),
+    path('ml/jobs/<int:pk>/', MLJobDetailView.as_view(), name='ml-job-detail'),
     
 ]
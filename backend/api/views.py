@@ -2,29 +2,59 @@ from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.core.mail import send_mail, EmailMessage
 from django.conf import settings
-from .models import Event, Feedback, Wishlist
+from .models import Event, Feedback, MLJob, Wishlist, normalize_tag
 from accounts.models import User
-from .serializers import EventSerializer, FeedbackSerializer, WishlistSerializer, EventDetailSerializer
+from .serializers import EventSerializer, FeedbackSerializer, WishlistSerializer, EventDetailSerializer, MLJobSerializer
 from accounts.permissions import IsOrganizer
-from ml.predict import predict_event_success
+from .pagination import EventCursorPagination
+from .filters import filter_events, parse_date_param
+from .stats import get_organizer_stats
+from .rollups import trending_interests
+from .event_import import detect_format, import_events, parse_import
+from .jobs import enqueue_job
+from .predictions import predict_fields
+from ml.export_students import export_student_features
+from ml.model import get_predictor
+from ml.prediction_cache import get_prediction_cache
 from ml.sentiment import predict_sentiment
-from ml.student_clustering import get_similar_students
-from ml.train_model import train_model
+from ml.student_clustering import get_similar_students, rebuild_similarity_index
 import logging
-import os
-import sys
-import subprocess
-from django.core.management import call_command
 
 # Public event list view
 class EventListView(generics.ListAPIView):
-    queryset = Event.objects.all().order_by('-date', '-time')
     serializer_class = EventSerializer
     permission_classes = []  # Public access
+    pagination_class = EventCursorPagination
+
+    def get_requested_fields(self):
+        # ?fields=id,title,date lets list clients skip description, schedule and the ML columns
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return None
+        return {'id'} | {f.strip() for f in fields.split(',') if f.strip()}
+
+    def get_queryset(self):
+        fields = self.get_requested_fields()
+        queryset = filter_events(Event.objects.all(), self.request.query_params).with_list_details(
+            self.request.user,
+            include_schedule=fields is None or 'schedule' in fields
+        )
+        if fields is not None and 'description' not in fields:
+            queryset = queryset.defer('description')
+        return queryset.order_by('-date', '-time')
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
     def get_serializer_context(self):
         return {'request': self.request}
 class PredictEventView(APIView):
@@ -33,26 +63,119 @@ class PredictEventView(APIView):
     def post(self, request):
         try:
             print("Received data for prediction:", request.data)
-            prediction = predict_event_success(request.data)
+            prediction = get_predictor().predict(request.data)
             print("Prediction result:", prediction)
             return Response(prediction)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+class BatchPredictEventView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsOrganizer]
+    max_batch_size = 500
+
+    def post(self, request):
+        events = request.data.get("events") if isinstance(request.data, dict) else request.data
+        if not isinstance(events, list) or not events:
+            return Response({"error": "Provide a non-empty list of events."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(events) > self.max_batch_size:
+            return Response(
+                {"error": f"At most {self.max_batch_size} events can be scored per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            results = get_predictor().predict_many(events)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        failed = sum(1 for r in results if "error" in r)
+        return Response({
+            "count": len(results),
+            "failed": failed,
+            "results": results
+        })
+
+class PredictionCacheStatsView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsOrganizer]
+
+    def get(self, request):
+        # Counters are per worker process
+        return Response(get_prediction_cache().stats())
+
+def request_flag(request, name, default=None):
+    """Boolean from the query string or request body; default when absent"""
+    value = request.query_params.get(name)
+    if value is None and hasattr(request.data, 'get'):
+        value = request.data.get(name)
+    if value is None:
+        return default
+    return str(value).lower() in ('1', 'true', 'yes')
+
 class EventCreateView(generics.CreateAPIView):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated, IsOrganizer]
 
+    def wants_prediction(self, validated_data):
+        # ?predict=true (or a "predict" form field) always scores on the server, predict=false
+        # never does; by default the server fills in predictions the client did not send
+        flag = request_flag(self.request, 'predict')
+        if flag is not None:
+            return flag
+        return validated_data.get('success_rate') is None
+
     def perform_create(self, serializer):
-        serializer.save(organizer=self.request.user)
+        predicted = {}
+        if self.wants_prediction(serializer.validated_data):
+            predicted = predict_fields([serializer.validated_data])[0] or {}
+        # Event, predictions and schedule rows are committed together
+        with transaction.atomic():
+            serializer.save(organizer=self.request.user, **predicted)
+
+class EventImportView(APIView):
+    """
+    Bulk-create events (with schedules) from an uploaded .csv/.json "file" or a
+    JSON body {"events": [...]}. Flags: strict (all rows or nothing), dry_run
+    (validate only) and predict (default true: fill missing predictions).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsOrganizer]
+    max_rows = 5000
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                fmt = detect_format(upload.name, upload.content_type)
+                rows = parse_import(upload.read().decode('utf-8-sig'), fmt)
+            else:
+                rows = request.data.get('events') if isinstance(request.data, dict) else request.data
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(rows, list) or not rows:
+            return Response({"error": "Provide a CSV/JSON file or a non-empty list of events."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.max_rows:
+            return Response({"error": f"At most {self.max_rows} events can be imported per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_events(
+            rows, request.user,
+            predict=request_flag(request, 'predict', True),
+            strict=request_flag(request, 'strict', False),
+            dry_run=request_flag(request, 'dry_run', False),
+        )
+        if report['created']:
+            code = status.HTTP_201_CREATED
+        elif report['dry_run'] and report['valid']:
+            code = status.HTTP_200_OK
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(report, status=code)
 
 class OrganizerEventListView(generics.ListAPIView):
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated, IsOrganizer]
 
     def get_queryset(self):
-        return Event.objects.filter(organizer=self.request.user).order_by('-date', '-time')
+        return Event.objects.filter(organizer=self.request.user).with_list_details(self.request.user).order_by('-date', '-time')
 
 class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Event.objects.all()
@@ -216,7 +339,7 @@ class StudentDashboardEventsView(generics.ListAPIView):
         user = self.request.user
         return Event.objects.filter(
             registered_users=user
-        ).order_by('-date', '-time')
+        ).with_list_details(user).order_by('-date', '-time')
     
     def get_serializer_context(self):
         return {'request': self.request}
@@ -224,105 +347,67 @@ class StudentDashboardEventsView(generics.ListAPIView):
 
 class OrganizerSentimentAnalyticsView(APIView):
     permission_classes = [IsAuthenticated, IsOrganizer]
+    sentiments = ("positive", "neutral", "negative")
 
-    def get(self, request):
-        organizer = request.user
-        events = Event.objects.filter(organizer=organizer)
-        feedbacks = Feedback.objects.filter(event__in=events)
-
-        total = feedbacks.count()
-        sentiment_count = {
-            "positive": 0,
-            "neutral": 0,
-            "negative": 0
-        }
-
-        for fb in feedbacks:
-            sent = getattr(fb, 'sentiment', 'neutral')  # fallback if missing
-            if sent in sentiment_count:
-                sentiment_count[sent] += 1
-            else:
-                sentiment_count["neutral"] += 1
-
+    def percentages(self, counts):
+        total = sum(counts.values())
         if total == 0:
-            return Response({
-                "positive": 0,
-                "neutral": 0,
-                "negative": 0
-            })
-
-        percentages = {
-            key: round((count / total) * 100)
-            for key, count in sentiment_count.items()
-        }
+            return {key: 0 for key in self.sentiments}
+        return {key: round((counts[key] / total) * 100) for key in self.sentiments}
 
-        return Response(percentages)
+    def get(self, request):
+        # Optional ?date_from=&date_to= (feedback date) and ?by_event=true
+        feedbacks = Feedback.objects.filter(event__organizer=request.user)
+        date_from = parse_date_param(request.query_params, 'date_from')
+        date_to = parse_date_param(request.query_params, 'date_to')
+        if date_from:
+            feedbacks = feedbacks.filter(created_at__date__gte=date_from)
+        if date_to:
+            feedbacks = feedbacks.filter(created_at__date__lte=date_to)
+
+        by_event = request.query_params.get('by_event', '').lower() in ('1', 'true', 'yes')
+        group_by = ['event_id', 'event__title', 'sentiment'] if by_event else ['sentiment']
+        rows = feedbacks.values(*group_by).annotate(count=Count('id')).order_by()
+
+        sentiment_count = dict.fromkeys(self.sentiments, 0)
+        per_event = {}
+        for row in rows:
+            # Missing or unknown sentiments count as neutral
+            sent = row['sentiment'] if row['sentiment'] in sentiment_count else "neutral"
+            sentiment_count[sent] += row['count']
+            if by_event:
+                entry = per_event.setdefault(row['event_id'], {
+                    "title": row['event__title'], "counts": dict.fromkeys(self.sentiments, 0)
+                })
+                entry["counts"][sent] += row['count']
+
+        response = self.percentages(sentiment_count)
+        if by_event:
+            response["events"] = [
+                {
+                    "event_id": event_id,
+                    "title": entry["title"],
+                    "total": sum(entry["counts"].values()),
+                    **self.percentages(entry["counts"]),
+                }
+                for event_id, entry in per_event.items()
+            ]
+        return Response(response)
 
 
 class TrendingInterestsView(APIView):
     permission_classes = [IsAuthenticated, IsOrganizer]
 
     def get(self, request):
-        # Get all events created by the organizer
-        organizer = request.user
-        events = Event.objects.filter(organizer=organizer)
-
-        interest_counter = {}
-
-        for event in events:
-            for tag in event.tags:
-                interest_counter[tag] = interest_counter.get(tag, 0) + event.registered_users.count()
-
-        # Sort by count descending
-        sorted_interests = sorted(interest_counter.items(), key=lambda x: x[1], reverse=True)
-
-        # Example logic to add mock growth for UI (you can calculate real growth later)
-        trending_data = [
-            {
-                "interest": interest,
-                "count": count,
-                "growth": f"+{10 + i * 2}%"
-            }
-            for i, (interest, count) in enumerate(sorted_interests)
-        ]
-
-        return Response(trending_data)
+        # Reads the weekly rollup buckets; growth is this week vs last week
+        return Response(trending_interests(request.user))
 
 
 class OrganizerStatsView(APIView):
     permission_classes = [IsAuthenticated, IsOrganizer]
 
     def get(self, request):
-        organizer = request.user
-        events = Event.objects.filter(organizer=organizer)
-
-        total_events_created = events.count() or 0
-
-        # Total students reached
-        total_students_reached = sum(event.registered_users.count() for event in events) or 0
-       # Total capacity across all events
-        total_capacity = sum(event.max_capacity for event in events) or 1  # avoid division by zero
-        # Attendance rate (in %)
-        attendance_rate = (total_students_reached / total_capacity) * 100 if total_capacity > 0 else 0
-        attendance_rate = round(attendance_rate, 2)
-
-        # Average rating across all feedback for organizer's events
-        feedbacks = Feedback.objects.filter(event__in=events)
-        avg_rating = feedbacks.aggregate(avg_rating=Avg('rating'))['avg_rating'] or 4.3
-        avg_rating = round(avg_rating, 2)
-
-        # Average success rate across events
-        avg_success_rate = events.aggregate(avg=Avg('success_rate'))['avg'] or 75.0
-        avg_success_rate = round(avg_success_rate, 2)
-
-        return Response({
-            "total_events_created": total_events_created ,
-            "total_students_reached": total_students_reached ,
-            "average_rating": avg_rating ,
-            "average_success_rate": avg_success_rate ,
-                        "attendance_rate": attendance_rate,
-            "total_capacity": total_capacity
-        })
+        return Response(get_organizer_stats(request.user))
 
 class StudentsByInterestView(APIView):
     permission_classes = [IsAuthenticated, IsOrganizer]
@@ -333,7 +418,7 @@ class StudentsByInterestView(APIView):
             return Response({"detail": "Interest tag is required."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            events = Event.objects.filter(organizer=request.user, tags__icontains=interest)
+            events = Event.objects.filter(organizer=request.user, tag_index__name=normalize_tag(interest))
 
             students = User.objects.filter(
                 registered_events__in=events,
@@ -358,6 +443,11 @@ class SimilarStudentsView(APIView):
             similar = get_similar_students(user_id, top_n=5)
             logger.info(f"Similar students result: {similar}")
             return Response(similar)
+        except FileNotFoundError:
+            # The index is only built by the clustering job and the feature export
+            logger.warning("SimilarStudentsView called before the similarity index was built")
+            return Response({"detail": "Similar students are not available yet."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             logger.error(f"Error in SimilarStudentsView: {e}", exc_info=True)
             return Response({"detail": str(e)}, status=500)
@@ -418,36 +508,53 @@ class ContactAPIView(APIView):
             return Response({"detail": f"Failed to send message: {str(e)}"}, status=500)
 
 
+def ml_job_accepted(request, job, created):
+    return Response({
+        "detail": "Job queued." if created else f"A {job.get_kind_display().lower()} job is already {job.status}.",
+        "job": MLJobSerializer(job).data,
+        "status_url": request.build_absolute_uri(reverse('ml-job-detail', args=[job.pk])),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
 # ML Model Retraining API
 class RetrainEventPredictionModelView(APIView):
     permission_classes = [IsAuthenticated, IsOrganizer]
 
     def post(self, request):
-        try:
-            # Step 1: Export completed events to CSV
-            call_command('export_completed_events')
-            # Step 2: Retrain the prediction model
-            train_model()
-            print("[ML] Event prediction model retrained successfully.")
-            return Response({"detail": "Event prediction model retrained successfully."}, status=200)
-        except Exception as e:
-            print(f"[ML] Event prediction model retraining failed: {str(e)}")
-            return Response({"detail": f"Retraining failed: {str(e)}"}, status=500)
-        
+        # Export + training run in `manage.py run_ml_worker`; poll the job for progress.
+        # {"warm_start": true} adds trees for newly exported events instead of refitting.
+        params = {"warm_start": str(request.data.get("warm_start", "")).lower() in ("1", "true")}
+        job, created = enqueue_job(MLJob.RETRAIN_EVENT_PREDICTION, request.user, params=params)
+        return ml_job_accepted(request, job, created)
+
 
 # ML Student Clustering Retraining API
 class RetrainStudentClusteringModelView(APIView):
     permission_classes = [IsAuthenticated, IsOrganizer]
 
     def post(self, request):
-        try:
-            from ml.student_clustering import train_clustering_model
-            train_clustering_model()
-            print("[ML] Student clustering model retrained successfully.")
-            return Response({"detail": "Student clustering model retrained successfully."}, status=200)
-        except Exception as e:
-            print(f"[ML] Student clustering model retraining failed: {str(e)}")
-            return Response({"detail": f"Retraining failed: {str(e)}"}, status=500)
+        job, created = enqueue_job(MLJob.RETRAIN_STUDENT_CLUSTERING, request.user)
+        return ml_job_accepted(request, job, created)
+
+
+# ML job status / progress
+class MLJobListView(generics.ListAPIView):
+    serializer_class = MLJobSerializer
+    permission_classes = [IsAuthenticated, IsOrganizer]
+
+    def get_queryset(self):
+        queryset = MLJob.objects.select_related('requested_by')
+        for field in ('kind', 'status'):
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset[:50]
+
+
+class MLJobDetailView(generics.RetrieveAPIView):
+    serializer_class = MLJobSerializer
+    permission_classes = [IsAuthenticated, IsOrganizer]
+    queryset = MLJob.objects.select_related('requested_by')
 
 
 # Export student features for clustering
@@ -456,30 +563,14 @@ class ExportStudentFeaturesView(APIView):
 
     def post(self, request):
         try:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            export_script = os.path.join(base_dir, "ml", "export_students.py")
-            feature_script = os.path.join(base_dir, "ml", "feature_engineering.py")
-            # Run export_students.py as a standalone script with Django setup
-            env = os.environ.copy()
-            env['DJANGO_SETTINGS_MODULE'] = 'backend.settings'
-            result1 = subprocess.run([
-                sys.executable, export_script
-            ], capture_output=True, text=True, cwd=os.path.join(base_dir, "ml"), env=env)
-            # Run feature_engineering.py
-            result2 = subprocess.run([
-                sys.executable, feature_script
-            ], capture_output=True, text=True, cwd=os.path.join(base_dir, "ml"))
-            if result1.returncode == 0 and result2.returncode == 0:
-                return Response({
-                    "detail": "Student features exported and engineered successfully.",
-                    "output_export": result1.stdout,
-                    "output_features": result2.stdout
-                }, status=200)
-            else:
-                return Response({
-                    "detail": "Export or feature engineering failed.",
-                    "export_err": result1.stderr,
-                    "features_err": result2.stderr
-                }, status=500)
+            # Rows go from the ORM straight into the feature builder, no CSV or subprocess in between
+            report = export_student_features()
+            # Rebuild the similarity index here so SimilarStudentsView never has to
+            index = rebuild_similarity_index()
+            report["indexed_students"] = len(index.user_ids) if index is not None else 0
+            return Response({
+                "detail": "Student features exported and engineered successfully.",
+                **report
+            }, status=200)
         except Exception as e:
             return Response({"detail": f"Export failed: {str(e)}"}, status=500)
\ No newline at end of file
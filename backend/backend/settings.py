@@ -86,6 +86,34 @@ DATABASES = {
     }
 }
 
+# Cache (per-organizer dashboard stats). LocMemCache is per process; set
+# CACHE_BACKEND/CACHE_LOCATION to a shared backend when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'campussync'),
+    }
+}
+
+# Student similarity search: 'exact', 'random_projection' (approximate) or 'auto'
+# (exact for small campuses). Applied when the clustering model is retrained.
+STUDENT_SIMILARITY_BACKEND = os.getenv('STUDENT_SIMILARITY_BACKEND', 'auto')
+
+# Event prediction artifact served by the API: 'forest' (memory-mapped ml/model.forest,
+# shared between workers) or 'pickle' (ml/model.pkl). Falls back to the pickle when
+# no forest artifact has been trained yet.
+EVENT_MODEL_FORMAT = os.getenv('EVENT_MODEL_FORMAT', 'forest')
+
+# Per-process LRU cache of event predictions, keyed on the encoded feature row and
+# model version. Size 0 disables it; the TTL is in seconds.
+EVENT_PREDICTION_CACHE_SIZE = int(os.getenv('EVENT_PREDICTION_CACHE_SIZE', 2048))
+EVENT_PREDICTION_CACHE_TTL = int(os.getenv('EVENT_PREDICTION_CACHE_TTL', 600))
+
+# Serve predictions from ml/model.grid.npz, a grid precomputed at training time over
+# every category/department/year/tag count and capacity knots (interpolated), with
+# the model as fallback. Training builds the grid when this is on.
+EVENT_PREDICTION_LOOKUP_GRID = os.getenv('EVENT_PREDICTION_LOOKUP_GRID', '').lower() in ('1', 'true', 'yes')
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
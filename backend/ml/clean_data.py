@@ -18,34 +18,39 @@ class NumpyEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
-def clean_event_dataset(filepath="event_dataset.csv", top_features_only=False):
-    # Data freshness check
-    df = pd.read_csv(filepath, quotechar='"', skipinitialspace=True)
-    # Remove rows with invalid dates
-    def is_valid_date(date_str):
-        try:
-            dt = pd.to_datetime(date_str, errors='coerce')
-            if pd.isnull(dt):
-                return False
-            return dt.year >= 1900 and dt.year <= 2100
-            # pd.to_datetime(date_str)
-            # return True
-        except Exception:
-            return False
+def valid_date_mask(dates):
+    """
+    (mask, parsed) for a column of date strings: mask is True where the value
+    parses as a date in 1900-2100. Column-level equivalent of calling
+    pd.to_datetime on each value.
+    """
+    parsed = pd.to_datetime(dates, errors='coerce', format='mixed')
+    return parsed.notna() & parsed.dt.year.between(1900, 2100), parsed
 
-    if 'date' in df.columns:
-        df = df[df['date'].apply(is_valid_date)]
-    if 'date' in df.columns and not df.empty:
-        newest_date = pd.to_datetime(df['date']).max()
-        print(f"Newest event date in data: {newest_date}")
-        if (datetime.now() - newest_date).days > 365:
-            print("⚠️ Warning: Data appears stale (>1 year old)")
-    # data = pd.read_csv(filepath)
-    # if 'date' in data.columns:
-    #     newest_date = pd.to_datetime(data['date']).max()
-    #     print(f"Newest event date in data: {newest_date}")
-    #     if (datetime.now() - newest_date).days > 365:
-    #         print("⚠️ Warning: Data appears stale (>1 year old)")
+
+def combine_date_time(dates, times):
+    """datetime.combine(date, time) for whole datetime64 columns"""
+    return dates.dt.normalize() + (times - times.dt.normalize())
+
+
+def row_keys(df, key_columns):
+    """
+    Stable identity for each dataset row: 'id:<event id>' for rows exported
+    from the database, otherwise the duplicate-detection key columns.
+    """
+    if key_columns:
+        keys = 'row:' + df[key_columns[0]].astype(str)
+        for col in key_columns[1:]:
+            keys = keys + '|' + df[col].astype(str)
+    else:
+        keys = 'row:' + df.index.astype(str).to_series(index=df.index)
+    if 'event_id' in df.columns:
+        ids = pd.to_numeric(df['event_id'], errors='coerce').dropna()
+        keys.loc[ids.index] = 'id:' + ids.astype('int64').astype(str)
+    return keys
+
+
+def clean_event_dataset(filepath="event_dataset.csv", top_features_only=False):
     """
     Clean the college event dataset with comprehensive data wrangling,
     including duplicate handling.
@@ -58,11 +63,20 @@ def clean_event_dataset(filepath="event_dataset.csv", top_features_only=False):
     - Cleaned DataFrame ready for ML training
     """
     
-    # Load the raw data
-    # df = pd.read_csv(filepath)
+    # Load the raw data (once)
     df = pd.read_csv(filepath, quotechar='"', skipinitialspace=True)
 
-    
+    # Remove rows with invalid dates
+    if 'date' in df.columns:
+        valid, parsed_dates = valid_date_mask(df['date'])
+        df = df[valid]
+    # Data freshness check
+    if 'date' in df.columns and not df.empty:
+        newest_date = parsed_dates[valid].max()
+        print(f"Newest event date in data: {newest_date}")
+        if (datetime.now() - newest_date).days > 365:
+            print("⚠️ Warning: Data appears stale (>1 year old)")
+
     print(f"Initial shape: {df.shape}")
     
     # 1. Handle duplicates (NEW SECTION)
@@ -88,6 +102,8 @@ def clean_event_dataset(filepath="event_dataset.csv", top_features_only=False):
     else:
         print("No key columns found for duplicate detection. Skipping key-based deduplication.")
     print(f"Shape after deduplication: {df.shape}")
+    # Taken from the raw values, so warm starts can tell which rows a model has seen
+    df['row_key'] = row_keys(df, key_columns_present)
 
     # 2. Handle missing values
     print("\nHandling missing values...")
@@ -139,7 +155,8 @@ def clean_event_dataset(filepath="event_dataset.csv", top_features_only=False):
         try:
             # Parse dates with error handling
             df['date'] = pd.to_datetime(df['date'], errors='coerce', format='%Y-%m-%d')
-            df['time'] = pd.to_datetime(df['time'], format='%H:%M', errors='coerce').dt.time
+            # Kept as datetime64 (on 1900-01-01) so combining with the date stays a column operation
+            df['time'] = pd.to_datetime(df['time'], format='%H:%M', errors='coerce')
             # Handle failed parses
             if df['date'].isna().any():
                 print(f"Warning: {df['date'].isna().sum()} invalid dates found - filling with mode")
@@ -151,7 +168,7 @@ def clean_event_dataset(filepath="event_dataset.csv", top_features_only=False):
             print(f"Critical error processing dates: {e}")
             return None
         # Combine date and time into datetime object
-        df['datetime'] = df.apply(lambda row: datetime.combine(row['date'], row['time']), axis=1)
+        df['datetime'] = combine_date_time(df['date'], df['time'])
         # Extract temporal features
         df['month'] = df['datetime'].dt.month
         df['day_of_week'] = df['datetime'].dt.dayofweek  # Monday=0, Sunday=6
@@ -226,7 +243,8 @@ def clean_event_dataset(filepath="event_dataset.csv", top_features_only=False):
         'senior_audience',
         'dept_popularity',
         'feature_version',
-        'success_rate'  # Target
+        'success_rate',  # Target
+        'row_key'
     ]
     # Only keep columns that exist in df
     df = df[[col for col in final_columns if col in df.columns]]
@@ -0,0 +1,24 @@
+# ml/config.py
+# Settings lookup shared by the ml modules: Django settings when running inside
+# the project, otherwise the environment variable of the same name.
+
+import os
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+def django_setting(name, default):
+    """settings.<name>, or the <name> environment variable parsed like `default`"""
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        # Running outside Django (scripts, notebooks)
+        value = os.getenv(name)
+        if value is None:
+            return default
+        if isinstance(default, bool):
+            return value.lower() in TRUE_VALUES
+        if isinstance(default, int):
+            return int(value)
+        return value
@@ -0,0 +1,80 @@
+# ml/dataset_store.py
+# Cached, typed snapshot of the cleaned event dataset. clean_event_dataset only
+# runs when the source CSV (or the cleaning code version) changed; otherwise the
+# cleaned columns are loaded straight from a NumPy .npz next to the CSV.
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .clean_data import clean_event_dataset
+from .registry import atomic_write, file_version
+
+# Bump when clean_event_dataset changes its output, so old snapshots are rebuilt
+CLEAN_DATA_VERSION = 2
+
+
+def snapshot_path_for(filepath, top_features_only=False):
+    suffix = '.clean-top.npz' if top_features_only else '.clean.npz'
+    return os.path.splitext(filepath)[0] + suffix
+
+
+def save_snapshot(df, path, key):
+    """One typed array per column; categoricals as codes and object columns as unicode plus a null mask"""
+    arrays = {'index': df.index.to_numpy()}
+    columns = []
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            arrays[f'c{i}'] = col.cat.codes.to_numpy()
+            columns.append({'name': name, 'kind': 'category', 'categories': col.cat.categories.tolist(),
+                            'ordered': bool(col.cat.ordered)})
+        elif col.dtype == object:
+            arrays[f'c{i}'] = col.fillna('').astype(str).to_numpy(dtype=str)
+            arrays[f'm{i}'] = col.isna().to_numpy()
+            columns.append({'name': name, 'kind': 'object'})
+        else:
+            arrays[f'c{i}'] = col.to_numpy()
+            columns.append({'name': name, 'kind': 'numeric'})
+    arrays['meta'] = np.array(json.dumps({'key': key, 'columns': columns}))
+    atomic_write(path, lambda f: np.savez(f, **arrays))
+
+
+def load_snapshot(path, key):
+    """The cached DataFrame, or None when there is no snapshot for `key`"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        if meta['key'] != key:
+            return None
+        columns = {}
+        for i, col in enumerate(meta['columns']):
+            values = data[f'c{i}']
+            if col['kind'] == 'category':
+                columns[col['name']] = pd.Categorical.from_codes(
+                    values, categories=col['categories'], ordered=col['ordered']
+                )
+            elif col['kind'] == 'object':
+                series = pd.Series(values, dtype=object)
+                series[data[f'm{i}']] = np.nan
+                columns[col['name']] = series.to_numpy()
+            else:
+                columns[col['name']] = values
+        return pd.DataFrame(columns, index=pd.Index(data['index']))
+
+
+def load_clean_event_dataset(filepath, top_features_only=False):
+    """clean_event_dataset(filepath), served from the snapshot when the CSV is unchanged"""
+    key = f"{file_version(filepath)}:v{CLEAN_DATA_VERSION}"
+    path = snapshot_path_for(filepath, top_features_only)
+    df = load_snapshot(path, key)
+    if df is not None:
+        print(f"[ML] Loaded cleaned dataset from snapshot {os.path.basename(path)} ({len(df)} rows)")
+        return df
+    df = clean_event_dataset(filepath, top_features_only=top_features_only)
+    if df is not None:
+        save_snapshot(df, path, key)
+    return df
@@ -1,43 +1,142 @@
+# ml/export_students.py
+# Student rows for ML clustering, read straight from the ORM.
+#
+# export_student_features() streams the rows into the feature builder in-process
+# (used by ExportStudentFeaturesView). The CSV dump is kept for inspection:
+# run as: python -m ml.export_students (from backend/)
 
-# Export student data for ML clustering
-# Can be run as: python export_students.py
-
+import csv
 import os
 import sys
-import django
-import csv
+import time
+from collections import defaultdict
+from itertools import islice
+
+from .feature_engineering import (
+    FEATURE_COLUMNS_PATH, FEATURES_PATH, STUDENT_COLUMNS, STUDENT_DATA_PATH, build_student_features,
+    save_student_features,
+)
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_student_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    One dict per student, with the student_ml_data.csv columns.
+
+    Students are streamed with .iterator() and handled chunk_size at a time: each
+    chunk costs one query for its registrations, one for its feedback and one for
+    the tags of events not seen yet, so memory stays bounded by the chunk and the
+    number of events rather than the number of students.
+    """
+    from accounts.models import User
+    from api.models import Event, Feedback
+
+    Registration = Event.registered_users.through
+    event_tags = {}
+    students = (
+        User.objects.filter(role='student').order_by('id')
+        .values_list('id', 'username', 'department', 'year')
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in _chunks(students, chunk_size):
+        user_ids = [user_id for user_id, *_ in chunk]
+
+        events_by_user = defaultdict(list)
+        registrations = (
+            Registration.objects.filter(user_id__in=user_ids)
+            .order_by('user_id', 'event_id').values_list('user_id', 'event_id')
+        )
+        for user_id, event_id in registrations:
+            events_by_user[user_id].append(event_id)
+
+        missing = {e for events in events_by_user.values() for e in events} - event_tags.keys()
+        if missing:
+            event_tags.update(Event.objects.filter(id__in=missing).values_list('id', 'tags'))
+
+        ratings_by_user = defaultdict(list)
+        sentiments_by_user = defaultdict(list)
+        feedbacks = (
+            Feedback.objects.filter(user_id__in=user_ids)
+            .order_by('user_id', 'id').values_list('user_id', 'rating', 'sentiment')
+        )
+        for user_id, rating, sentiment in feedbacks:
+            if rating is not None:
+                ratings_by_user[user_id].append(str(rating))
+            if sentiment:
+                sentiments_by_user[user_id].append(sentiment)
+
+        for user_id, username, department, year in chunk:
+            events = events_by_user.get(user_id, [])
+            # Unique tags, first-seen order
+            tags = dict.fromkeys(tag for e in events for tag in (event_tags[e] or []))
+            yield {
+                'user_id': user_id,
+                'username': username,
+                'department': department or '',
+                'year': year or '',
+                'event_ids': ';'.join(str(e) for e in events),
+                'event_tags': ';'.join(tags),
+                'feedback_ratings': ';'.join(ratings_by_user.get(user_id, [])),
+                'feedback_sentiments': ';'.join(sentiments_by_user.get(user_id, [])),
+            }
+
+
+def _throughput(rows, seconds):
+    return round(rows / seconds) if seconds > 0 else rows
+
+
+def export_student_csv(path=STUDENT_DATA_PATH, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write the rows to path; returns {"students", "seconds", "rows_per_s"}"""
+    start = time.perf_counter()
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=STUDENT_COLUMNS)
+        writer.writeheader()
+        for row in iter_student_rows(chunk_size):
+            writer.writerow(row)
+            count += 1
+    seconds = time.perf_counter() - start
+    return {'students': count, 'seconds': round(seconds, 4), 'rows_per_s': _throughput(count, seconds)}
+
+
+def export_student_features(chunk_size=EXPORT_CHUNK_SIZE, path=FEATURES_PATH, columns_path=FEATURE_COLUMNS_PATH):
+    """
+    Build and save the clustering features from the database in one pass, without
+    the intermediate CSV or a DataFrame: rows go into the feature builder as the
+    chunks are read. Returns a small report with sizes and timings.
+    """
+    start = time.perf_counter()
+    features = build_student_features(iter_student_rows(chunk_size))
+    built = time.perf_counter()
+    save_student_features(features, path, columns_path)
+    done = time.perf_counter()
+    return {
+        'students': features.matrix.shape[0],
+        'features': features.matrix.shape[1],
+        'non_zeros': int(features.matrix.nnz),
+        'build_s': round(built - start, 4),
+        'save_s': round(done - built, 4),
+        'total_s': round(done - start, 4),
+        'rows_per_s': _throughput(features.matrix.shape[0], built - start),
+    }
+
 
+if __name__ == '__main__':
+    import django
 
-# Setup Django
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(BASE_DIR)
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
-django.setup()
-from accounts.models import User
-from api.models import Event, Feedback
-
-with open('student_ml_data.csv', 'w', newline='', encoding='utf-8') as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow([
-        'user_id', 'username', 'department', 'year', 'event_ids', 'event_tags', 'feedback_ratings', 'feedback_sentiments'
-    ])
-    for user in User.objects.filter(role='student'):
-        # Events participated
-        events = user.registered_events.all()
-        event_ids = [str(e.id) for e in events]
-        event_tags = list(set(tag for e in events for tag in (e.tags or [])))
-        # Feedback
-        feedbacks = user.feedbacks.all()
-        feedback_ratings = [str(f.rating) for f in feedbacks if f.rating is not None]
-        feedback_sentiments = [f.sentiment for f in feedbacks if f.sentiment]
-        writer.writerow([
-            user.id,
-            user.username,
-            user.department or '',
-            user.year or '',
-            ';'.join(event_ids),
-            ';'.join(event_tags),
-            ';'.join(feedback_ratings),
-            ';'.join(feedback_sentiments)
-        ])
-print('Exported student data to student_ml_data.csv')
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    report = export_student_csv()
+    print(f"Exported {report['students']} students to {STUDENT_DATA_PATH} "
+          f"in {report['seconds']}s ({report['rows_per_s']} rows/s)")
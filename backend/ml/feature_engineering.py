@@ -1,52 +1,137 @@
 # feature_engineering.py
-# This script loads student_ml_data.csv and performs feature engineering for clustering.
-# It outputs student_features.csv for ML model training.
+# Builds the student clustering features, either from rows streamed out of the
+# database (see ml/export_students.py) or from student_ml_data.csv.
+# Features stay a SciPy sparse CSR matrix end to end and are saved as
+# student_features.npz, with column names and row ids in student_features.json.
+# Run as: python -m ml.feature_engineering (from backend/)
 
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.preprocessing import MultiLabelBinarizer, OneHotEncoder
-import numpy as np
 
-# Load data
-csv_path = 'student_ml_data.csv'
-df = pd.read_csv(csv_path, sep=',')
-
-# Fill NaN with empty string for split
-for col in ['event_tags', 'department', 'year', 'feedback_sentiments']:
-    df[col] = df[col].fillna('')
-
-# Convert tags to list
-all_tags = set()
-tag_lists = []
-for tags in df['event_tags']:
-    tag_list = [t.strip() for t in tags.split(';') if t.strip()]
-    tag_lists.append(tag_list)
-    all_tags.update(tag_list)
-
-mlb = MultiLabelBinarizer()
-tag_matrix = mlb.fit_transform(tag_lists)
-tag_df = pd.DataFrame(tag_matrix, columns=[f'tag_{t}' for t in mlb.classes_])
-
-# One-hot encode department and year
-ohe = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-dep_year = df[['department', 'year']].astype(str)
-dep_year_ohe = ohe.fit_transform(dep_year)
-dep_year_df = pd.DataFrame(dep_year_ohe, columns=ohe.get_feature_names_out(['department', 'year']))
-
-# Sentiment features (count of positive/negative/neutral)
-def count_sentiments(sentiments, target):
-    return sentiments.count(target)
-
-sentiment_counts = pd.DataFrame({
-    'sentiment_positive': df['feedback_sentiments'].apply(lambda s: count_sentiments(s, 'positive')),
-    'sentiment_negative': df['feedback_sentiments'].apply(lambda s: count_sentiments(s, 'negative')),
-    'sentiment_neutral': df['feedback_sentiments'].apply(lambda s: count_sentiments(s, 'neutral')),
-})
-
-# Combine all features
-features = pd.concat([tag_df, dep_year_df, sentiment_counts], axis=1)
-features['user_id'] = df['user_id']
-features['username'] = df['username']
-
-# Save features for ML
-features.to_csv('student_features.csv', index=False)
-print('Feature engineering complete. Output: student_features.csv')
+from .registry import atomic_write
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+STUDENT_DATA_PATH = os.path.join(ML_DIR, 'student_ml_data.csv')
+FEATURES_PATH = os.path.join(ML_DIR, 'student_features.npz')
+FEATURE_COLUMNS_PATH = os.path.join(ML_DIR, 'student_features.json')
+
+STUDENT_COLUMNS = [
+    'user_id', 'username', 'department', 'year', 'event_ids', 'event_tags', 'feedback_ratings', 'feedback_sentiments'
+]
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+StudentFeatures = namedtuple('StudentFeatures', ['matrix', 'columns', 'user_ids', 'usernames'])
+
+
+def build_student_features(df):
+    """
+    df is a DataFrame with STUDENT_COLUMNS or an iterable of row dicts. Rows
+    from an iterable are consumed one at a time and only the fields the
+    features need are kept, so a streamed export never holds the full table.
+    """
+    if not isinstance(df, pd.DataFrame):
+        return _assemble_features(*_collect_rows(df))
+    df = df.copy()
+    # Fill NaN with empty string for split
+    for col in ['event_tags', 'department', 'year', 'feedback_sentiments']:
+        df[col] = df[col].fillna('')
+    return _assemble_features(
+        user_ids=df['user_id'].to_numpy(dtype=np.int64),
+        usernames=df['username'].fillna('').astype(str).tolist(),
+        dep_year=df[['department', 'year']].astype(str).to_numpy(),
+        tag_lists=[_split_tags(tags) for tags in df['event_tags']],
+        sentiment_counts=np.column_stack([
+            df['feedback_sentiments'].str.count(target).to_numpy() for target in SENTIMENTS
+        ]),
+    )
+
+
+def _split_tags(tags):
+    return [t.strip() for t in tags.split(';') if t.strip()]
+
+
+def _collect_rows(rows):
+    user_ids, usernames, dep_year, tag_lists, sentiment_counts = [], [], [], [], []
+    for row in rows:
+        user_ids.append(row['user_id'])
+        usernames.append(str(row['username'] or ''))
+        dep_year.append(['' if row[col] is None else str(row[col]) for col in ('department', 'year')])
+        tag_lists.append(_split_tags(row['event_tags'] or ''))
+        sentiments = row['feedback_sentiments'] or ''
+        sentiment_counts.append([sentiments.count(target) for target in SENTIMENTS])
+    return (
+        np.array(user_ids, dtype=np.int64),
+        usernames,
+        np.array(dep_year, dtype=object).reshape(-1, 2),
+        tag_lists,
+        np.array(sentiment_counts, dtype=np.float64).reshape(-1, len(SENTIMENTS)),
+    )
+
+
+def _assemble_features(user_ids, usernames, dep_year, tag_lists, sentiment_counts):
+    # Tags -> sparse multi-hot
+    mlb = MultiLabelBinarizer(sparse_output=True)
+    tag_matrix = mlb.fit_transform(tag_lists)
+    tag_columns = [f'tag_{t}' for t in mlb.classes_]
+
+    # One-hot encode department and year
+    ohe = OneHotEncoder(sparse_output=True, handle_unknown='ignore')
+    dep_year_matrix = ohe.fit_transform(dep_year)
+    dep_year_columns = list(ohe.get_feature_names_out(['department', 'year']))
+
+    # Sentiment features (count of positive/negative/neutral)
+    sentiment_matrix = sparse.csr_matrix(np.asarray(sentiment_counts, dtype=np.float64))
+    sentiment_columns = [f'sentiment_{s}' for s in SENTIMENTS]
+
+    matrix = sparse.hstack([tag_matrix, dep_year_matrix, sentiment_matrix], format='csr', dtype=np.float64)
+    return StudentFeatures(
+        matrix=matrix,
+        columns=tag_columns + dep_year_columns + sentiment_columns,
+        user_ids=user_ids,
+        usernames=usernames,
+    )
+
+
+def save_student_features(features, path=FEATURES_PATH, columns_path=FEATURE_COLUMNS_PATH):
+    meta = {
+        'columns': list(features.columns),
+        'user_ids': [int(u) for u in features.user_ids],
+        'usernames': list(features.usernames),
+    }
+    atomic_write(path, lambda f: sparse.save_npz(f, features.matrix))
+    atomic_write(columns_path, lambda f: json.dump(meta, f), mode='w')
+
+
+def load_student_features(path=FEATURES_PATH, columns_path=FEATURE_COLUMNS_PATH):
+    with open(columns_path, 'r') as f:
+        meta = json.load(f)
+    return StudentFeatures(
+        matrix=sparse.load_npz(path).tocsr(),
+        columns=meta['columns'],
+        user_ids=np.array(meta['user_ids'], dtype=np.int64),
+        usernames=meta['usernames'],
+    )
+
+
+def select_columns(features, columns):
+    """Sparse matrix with exactly `columns`, in order; columns not present are all-zero"""
+    position = {name: i for i, name in enumerate(features.columns)}
+    pairs = [(position[name], j) for j, name in enumerate(columns) if name in position]
+    rows, cols = zip(*pairs) if pairs else ((), ())
+    selector = sparse.csr_matrix(
+        (np.ones(len(pairs)), (rows, cols)), shape=(len(features.columns), len(columns))
+    )
+    return (features.matrix @ selector).tocsr()
+
+
+if __name__ == "__main__":
+    features = build_student_features(pd.read_csv(STUDENT_DATA_PATH, sep=','))
+    save_student_features(features)
+    print(f'Feature engineering complete. Output: {FEATURES_PATH} '
+          f'({features.matrix.shape[0]} students x {features.matrix.shape[1]} features, {features.matrix.nnz} non-zeros)')
@@ -0,0 +1,152 @@
+# ml/forest_artifact.py
+# Compact serving format for the event prediction RandomForest.
+#
+# Every tree's nodes are flattened into shared arrays (children, split feature,
+# threshold, leaf value) and written to one file: a JSON header followed by the
+# raw arrays at aligned offsets. Loading memory-maps the arrays read-only, so a
+# cold start is just reading the header and every worker on the host shares the
+# same page-cache copy instead of unpickling its own forest.
+
+import json
+import struct
+
+import numpy as np
+
+from .registry import atomic_write
+
+MAGIC = b'CSFOREST'
+FORMAT_VERSION = 1
+ALIGN = 64
+
+TREE_ARRAYS = ('left', 'right', 'feature', 'threshold', 'value', 'missing_left', 'roots')
+
+
+class FlatForest:
+    """
+    Prediction-only view of a fitted RandomForestRegressor. Per-tree outputs
+    match sklearn exactly (the forest mean up to float rounding);
+    predict_per_tree() gets every tree's output from a single vectorised
+    traversal.
+    """
+
+    def __init__(self, left, right, feature, threshold, value, missing_left, roots, max_depth, n_features):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.missing_left = missing_left
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        arrays = {name: [] for name in TREE_ARRAYS if name != 'roots'}
+        roots = []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            # Leaves point at themselves, so a finished path just stays put while deeper paths catch up
+            own = np.arange(tree.node_count) + offset
+            arrays['left'].append(np.where(is_leaf, own, tree.children_left + offset))
+            arrays['right'].append(np.where(is_leaf, own, tree.children_right + offset))
+            arrays['feature'].append(np.where(is_leaf, 0, tree.feature))
+            arrays['threshold'].append(tree.threshold)
+            arrays['value'].append(tree.value[:, 0, 0])
+            missing = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+            arrays['missing_left'].append(np.asarray(missing))
+            offset += tree.node_count
+        return cls(
+            left=np.concatenate(arrays['left']).astype(np.int32),
+            right=np.concatenate(arrays['right']).astype(np.int32),
+            feature=np.concatenate(arrays['feature']).astype(np.int32),
+            threshold=np.concatenate(arrays['threshold']).astype(np.float64),
+            value=np.concatenate(arrays['value']).astype(np.float64),
+            missing_left=np.concatenate(arrays['missing_left']).astype(bool),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max(e.tree_.max_depth for e in forest.estimators_),
+            n_features=forest.n_features_in_,
+        )
+
+    def predict_per_tree(self, X):
+        """(n_samples, n_trees) array of each tree's prediction"""
+        # sklearn compares float32 inputs against float64 thresholds; do the same
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(x), self.missing_left[nodes], x <= self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes]
+
+    def predict(self, X):
+        return self.predict_per_tree(X).mean(axis=1)
+
+
+def save_forest(path, forest, meta):
+    """Write forest (a FlatForest or fitted RandomForestRegressor) plus JSON-able meta to path"""
+    if not isinstance(forest, FlatForest):
+        forest = FlatForest.from_sklearn(forest)
+    arrays = {name: np.ascontiguousarray(getattr(forest, name)) for name in TREE_ARRAYS}
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    header = json.dumps({
+        'format_version': FORMAT_VERSION,
+        'max_depth': forest.max_depth,
+        'n_features': forest.n_features_in_,
+        'arrays': layout,
+        'meta': meta,
+    }).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+
+    def write(f):
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.tobytes())
+
+    atomic_write(path, write)
+
+
+def load_forest(path, mmap=True):
+    """(FlatForest, meta); arrays are read-only memory maps unless mmap=False"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a forest artifact")
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len))
+    if header['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported forest artifact version {header['format_version']}")
+    data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGN) * ALIGN
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype, shape = np.dtype(spec['dtype']), tuple(spec['shape'])
+        if mmap:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=data_start + spec['offset'], shape=shape)
+        else:
+            with open(path, 'rb') as f:
+                f.seek(data_start + spec['offset'])
+                arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+    forest = FlatForest(max_depth=header['max_depth'], n_features=header['n_features'], **arrays)
+    return forest, header['meta']
+
+
+def load_event_model_artifact(path):
+    """Registry loader: the same dict shape as model.pkl, with a FlatForest as "model" """
+    forest, meta = load_forest(path)
+    return {'model': forest, **meta}
@@ -0,0 +1,91 @@
+# ml/lookup_grid.py
+# Optional precomputed answers for the event model. Apart from capacity every
+# feature is a small integer code (8 categories x 6 departments x 4 years x a
+# handful of tag counts), so training can score the whole space once on a grid
+# of capacity knots. Serving is then an array index plus linear interpolation
+# between the two nearest capacity knots; rows outside the grid go to the model.
+
+import os
+
+import numpy as np
+
+from .config import django_setting
+from .registry import atomic_write
+
+GRID_PATH = os.path.join(os.path.dirname(__file__), 'model.grid.npz')
+CAPACITY_STEP = 10
+CHANNELS = ('mean', 'lower', 'upper', 'stability')
+
+
+class LookupGrid:
+    """
+    values[category, department, year, capacity knot, num_tags] holds the
+    model's (mean, lower, upper, stability) for that cell; `model_id` ties the
+    grid to the training run that produced it.
+    """
+
+    def __init__(self, values, capacities, model_id):
+        self.values = values
+        self.capacities = capacities
+        self.model_id = str(model_id)
+
+    @property
+    def cells(self):
+        return int(np.prod(self.values.shape[:-1]))
+
+    def lookup(self, X):
+        """(scores, inside): (n, 4) interpolated scores, valid where `inside` is True"""
+        X = np.asarray(X, dtype=float)
+        scores = np.full((len(X), len(CHANNELS)), np.nan)
+        codes = X[:, [0, 1, 2, 4]]
+        limits = np.array(self.values.shape)[[0, 1, 2, 4]]
+        capacity = X[:, 3]
+        inside = (
+            np.all((codes == np.floor(codes)) & (codes >= 0) & (codes < limits), axis=1)
+            & (capacity >= self.capacities[0]) & (capacity <= self.capacities[-1])
+        )
+        if not inside.any():
+            return scores, inside
+
+        cat, dept, year, tags = codes[inside].astype(int).T
+        capacity = capacity[inside]
+        knot = np.clip(np.searchsorted(self.capacities, capacity, side='right') - 1, 0, len(self.capacities) - 2)
+        low, high = self.capacities[knot], self.capacities[knot + 1]
+        weight = ((capacity - low) / (high - low))[:, None]
+        below = self.values[cat, dept, year, knot, tags]
+        above = self.values[cat, dept, year, knot + 1, tags]
+        scores[inside] = below * (1 - weight) + above * weight
+        return scores, inside
+
+
+def capacity_knots(capacities, step=CAPACITY_STEP):
+    """Knots every `step` seats covering the trained capacity range"""
+    low = np.floor(np.min(capacities) / step) * step
+    high = max(np.ceil(np.max(capacities) / step) * step, low + step)
+    return np.arange(low, high + step, step, dtype=float)
+
+
+def build_lookup_grid(score_fn, n_categories, n_departments, n_years, capacities, max_tags, model_id):
+    """
+    Score every cell with score_fn(X) -> (mean, lower, upper, stability), the
+    same function the predictor serves with, in a single call.
+    """
+    shape = (n_categories, n_departments, n_years, len(capacities), max_tags + 1)
+    cat, dept, year, knot, tags = np.indices(shape).reshape(len(shape), -1)
+    X = np.column_stack([cat, dept, year, capacities[knot], tags]).astype(float)
+    values = np.column_stack(score_fn(X)).astype(np.float32)
+    return LookupGrid(values.reshape(shape + (len(CHANNELS),)), np.asarray(capacities, dtype=float), model_id)
+
+
+def save_lookup_grid(path, grid):
+    atomic_write(path, lambda f: np.savez(f, values=grid.values, capacities=grid.capacities,
+                                          model_id=np.array(grid.model_id)))
+
+
+def load_lookup_grid(path):
+    with np.load(path) as data:
+        return LookupGrid(data['values'], data['capacities'], data['model_id'].item())
+
+
+def lookup_grid_enabled():
+    return django_setting('EVENT_PREDICTION_LOOKUP_GRID', False)
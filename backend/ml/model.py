@@ -1,165 +1,217 @@
-import pandas as pd
-import joblib
-from datetime import datetime
+# ml/model.py
+# EventSuccessPredictor: the single predictor behind /api/predict/ and
+# /api/predict/batch/. Input is encoded once into the model's feature rows and
+# every tree is evaluated in one stacked pass, so the confidence interval and
+# stability come from the same work as the plain prediction. Repeated feature
+# rows are answered from the in-process prediction cache, or from the
+# precomputed lookup grid when EVENT_PREDICTION_LOOKUP_GRID is on.
+
 import numpy as np
+from .lookup_grid import GRID_PATH, load_lookup_grid, lookup_grid_enabled
+from .prediction_cache import get_prediction_cache
+from .registry import get_event_model, get_registry
+
+FEATURES = ["category", "department", "target_year", "capacity", "num_tags"]
+
+
+def encode_event(data, model_data):
+    """Turn one event payload into the model's feature row"""
+    cat_map = model_data["category_map"]
+    dept_map = model_data["department_map"]
+    year_map = model_data["year_map"]
+
+    # Convert incoming fields
+    cat = cat_map.get(data["category"].capitalize(), 0)
+    dept = dept_map.get(data["department"].capitalize(), 0)
+    year = year_map.get(str(data["target_year"]), 0)
+    capacity = int(data["max_capacity"])
+    num_tags = len(data.get("tags", []))
+    return [cat, dept, year, capacity, num_tags]
+
+
+def build_prediction(success_rate, capacity, model_version, lower=None, upper=None, stability=None):
+    success_rate = round(success_rate)
+    prediction = {
+        "success_rate": success_rate,
+        "expected_attendees": round(success_rate * capacity / 100),
+        "engagement": min(100, round(success_rate + 5)),  # mock boost
+        "sentiment": "Positive" if success_rate > 70 else "Neutral" if success_rate > 50 else "Negative",
+        "model_version": model_version,
+    }
+    if lower is not None:
+        prediction["confidence_interval"] = [round(float(lower), 1), round(float(upper), 1)]
+        prediction["stability"] = round(float(stability), 3)
+    return prediction
+
+
+def error_message(exc):
+    """User-facing message for an exception raised while encoding a payload"""
+    if isinstance(exc, KeyError):
+        return f"Missing required field: {exc.args[0]}"
+    return str(exc)
+
 
 class EventSuccessPredictor:
-    def _validate_input(self, form_data):
-        required_fields = {
-            'title': str,
-            'category': str,
-            'department': str,
-            'targetYear': (str, int),
-            'maxCapacity': (str, int),
-            'location': str,
-            'date': str,
-            'time': str,
-            'tags': list
-        }
-        for field, field_type in required_fields.items():
-            if field not in form_data:
-                raise ValueError(f"Missing required field: {field}")
-            if not isinstance(form_data[field], field_type):
-                raise ValueError(f"Field {field} should be type {field_type}")
-    def __init__(self, model_path='event_success_model.joblib'):
-        try:
-            self.model = joblib.load(model_path)
-            print("✅ Model loaded successfully")
-        except Exception as e:
-            print(f"❌ Error loading model: {e}")
-            raise
-    def _validate_input(self, form_data):
-        """More robust validation with error messages"""
-        errors = []
-        required = {
-            'title': (str, 3, 100),  # min 3, max 100 chars
-            'capacity': (int, 10, 500),
-            'date': (str, None, None)  # will validate date format later
-        }
-        
-        for field, (dtype, min_val, max_val) in required.items():
-            if field not in form_data:
-                errors.append(f"Missing required field: {field}")
-                continue
-                
+    """
+    Wraps one loaded event model artifact: the memory-mapped FlatForest
+    (model.forest) or the sklearn RandomForestRegressor (model.pkl).
+    """
+
+    def __init__(self, model_data, version=None, cache=None, grid=None):
+        self.model_data = model_data
+        self.model = model_data["model"]
+        self.version = version
+        self.cache = cache
+        self.grid = grid
+
+    @classmethod
+    def from_artifact(cls, loaded, cache=None, grid=None):
+        predictor = cls(loaded.data, loaded.version, cache, grid)
+        predictor.artifact = loaded
+        return predictor
+
+    def prepare_features(self, items):
+        """
+        Encode payloads into one float matrix. Returns (X, row_index, errors):
+        row_index[i] is the input position of X[i], errors maps input position
+        to the exception raised for a payload that could not be encoded.
+        """
+        rows, row_index, errors = [], [], {}
+        for i, data in enumerate(items):
             try:
-                val = dtype(form_data[field])
-                if min_val is not None and val < min_val:
-                    errors.append(f"{field} must be ≥ {min_val}")
-                if max_val is not None and val > max_val:
-                    errors.append(f"{field} must be ≤ {max_val}")
-            except (ValueError, TypeError):
-                errors.append(f"{field} must be type {dtype.__name__}")
-        
+                if not isinstance(data, dict):
+                    raise ValueError("Each event must be an object.")
+                rows.append(encode_event(data, self.model_data))
+                row_index.append(i)
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                errors[i] = e
+        X = np.array(rows, dtype=float).reshape(len(rows), len(FEATURES))
+        return X, row_index, errors
+
+    def predict_per_tree(self, X):
+        """(n_samples, n_trees) predictions of every tree"""
+        if hasattr(self.model, "predict_per_tree"):
+            return self.model.predict_per_tree(X)
+        # sklearn forest (EVENT_MODEL_FORMAT=pickle): trees expect float32 input
+        X32 = np.asarray(X, dtype=np.float32)
+        return np.stack([tree.predict(X32) for tree in self.model.estimators_], axis=1)
+
+    def predict_with_confidence(self, X):
+        """(mean, lower, upper, stability) arrays; the interval is clipped to 30-99 like the target"""
+        per_tree = self.predict_per_tree(X)
+        mean = per_tree.mean(axis=1)
+        std = per_tree.std(axis=1)
+        lower = np.maximum(30, mean - 1.96 * std)
+        upper = np.minimum(99, mean + 1.96 * std)
+        stability = 1 - np.divide(std, mean, out=np.zeros_like(std), where=mean != 0)
+        return mean, lower, upper, stability
+
+    def score(self, X):
+        """
+        (mean, lower, upper, stability) arrays: interpolated from the lookup
+        grid where it covers the row, otherwise from the cached model path
+        """
+        if self.grid is None:
+            return self._score_model(X)
+        scores, inside = self.grid.lookup(X)
+        if not inside.all():
+            scores[~inside] = np.column_stack(self._score_model(X[~inside]))
+        return tuple(scores.T)
+
+    def _score_model(self, X):
+        """predict_with_confidence() through the cache: only rows not seen under this model version reach the forest"""
+        if self.cache is None:
+            return self.predict_with_confidence(X)
+        keys = [(self.version, tuple(row)) for row in X.tolist()]
+        scores = np.empty((len(keys), 4))
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
+        if missing:
+            fresh = np.column_stack(self.predict_with_confidence(X[missing]))
+            scores[missing] = fresh
+            for i, values in zip(missing, fresh.tolist()):
+                self.cache.put(keys[i], tuple(values))
+        return tuple(scores.T)
+
+    def predict(self, data):
+        """Prediction dict for one payload; raises on invalid input"""
+        X, _, errors = self.prepare_features([data])
         if errors:
-            raise ValueError(" | ".join(errors))
-        
-    def predict_with_confidence(self, form_data):
-        """Return prediction with confidence interval"""
-        input_df = self.prepare_features(form_data)
-        predictions = []
-        for tree in self.model.named_steps['regressor'].estimators_:
-            pred = tree.predict(
-                self.model.named_steps['preprocessor'].transform(input_df)
-            )[0]
-            predictions.append(pred)
-        
-        mean_pred = np.mean(predictions)
-        std_pred = np.std(predictions)
-        return {
-            'prediction': mean_pred,
-            'confidence_interval': (
-                max(30, mean_pred - 1.96*std_pred),
-                min(99, mean_pred + 1.96*std_pred)
-            ),
-            'stability': 1 - (std_pred / mean_pred)
-        }
-    def _get_time_of_day(self, hour):
-        """Helper to categorize time of day"""
-        if hour < 12: return 'morning'
-        elif hour < 17: return 'afternoon'
-        return 'evening'
-
-    def prepare_features(self, form_data):
-        self._validate_input(form_data)
-        try:
-            # Parse datetime
-            event_date = datetime.strptime(form_data['date'], '%Y-%m-%d')
-            event_time = datetime.strptime(form_data['time'], '%H:%M').time()
-            # Build feature dictionary
-            features = {
-                'event_title': form_data['title'],
-                'category': form_data['category'],
-                'department': form_data['department'],
-                'target_year': int(form_data['targetYear']),
-                'capacity': int(form_data['maxCapacity']),
-                'location': form_data['location'],
-                'month': event_date.month,
-                'day_of_week': event_date.weekday(),  # Monday=0
-                'hour': event_time.hour,
-                'event_tags': ', '.join(form_data['tags']),
-                'title_length': len(form_data['title']),
-                'title_word_count': len(form_data['title'].split()),
-                'num_tags': len(form_data['tags']),
-                'is_weekend': int(event_date.weekday() in [5, 6]),
-                'time_of_day': self._get_time_of_day(event_time.hour)
-            }
-            return pd.DataFrame([features])
-        except Exception as e:
-            print(f"❌ Error preparing features: {e}")
-            raise
-
-    def explain_prediction(self, form_data):
-        """Provide feature importance for a prediction"""
-        input_df = self.prepare_features(form_data)
-        # For RandomForest models
-        if hasattr(self.model.named_steps['regressor'], 'feature_importances_'):
-            importances = self.model.named_steps['regressor'].feature_importances_
-            feature_names = self.model.named_steps['preprocessor'].get_feature_names_out()
-            return sorted(zip(feature_names, importances), key=lambda x: -x[1])
-        return None
+            raise errors[0]
+        mean, lower, upper, stability = self.score(X)
+        return build_prediction(mean[0], X[0, 3], self.version, lower[0], upper[0], stability[0])
 
-    def predict(self, form_data):
+    def predict_many(self, items):
         """
-        Make success rate prediction from form data
-        Args:
-            form_data: Dict from frontend form
-        Returns:
-            float: Predicted success rate (0-100)
+        One entry per input (in order): the prediction fields with its "index",
+        or an "error" message for items that could not be encoded.
         """
-        try:
-            # Prepare features
-            input_df = self.prepare_features(form_data)
-            
-            # Make prediction
-            prediction = self.model.predict(input_df)[0]
-            
-            # Clip to realistic range
-            return max(30, min(99, round(prediction, 1)))
-            
-        except Exception as e:
-            print(f"❌ Prediction failed: {e}")
-            raise
+        X, row_index, errors = self.prepare_features(items)
+        results = [{"index": i, "error": error_message(e)} for i, e in sorted(errors.items())]
+        if len(X):
+            mean, lower, upper, stability = self.score(X)
+            for row, i in enumerate(row_index):
+                results.append({"index": i, **build_prediction(
+                    mean[row], X[row, 3], self.version, lower[row], upper[row], stability[row]
+                )})
+        return sorted(results, key=lambda r: r["index"])
+
+    def explain_prediction(self):
+        """Feature importances of the served model, most important first"""
+        importances = self.model_data.get("feature_importances")
+        if importances is None and hasattr(self.model, "feature_importances_"):
+            importances = dict(zip(FEATURES, self.model.feature_importances_.tolist()))
+        if importances is None:
+            return None
+        return sorted(importances.items(), key=lambda x: -x[1])
+
+
+_predictor = None
+
+
+def get_predictor():
+    """
+    Predictor for the currently served artifact. When a retrain swaps the
+    artifact the predictor is rebuilt and the prediction cache cleared (cache
+    keys carry the model version as well, so stale entries can never match).
+    """
+    global _predictor
+    loaded = get_event_model()
+    predictor = _predictor
+    if predictor is None or predictor.artifact is not loaded:
+        cache = get_prediction_cache()
+        if predictor is not None:
+            cache.clear()
+        predictor = _predictor = EventSuccessPredictor.from_artifact(loaded, cache, current_lookup_grid(loaded.data))
+    return predictor
+
+
+def current_lookup_grid(model_data):
+    """The lookup grid trained alongside model_data, or None (disabled, missing, or from another run)"""
+    grid_id = model_data.get("lookup_grid_id")
+    if not lookup_grid_enabled() or grid_id is None:
+        return None
+    try:
+        grid = get_registry(GRID_PATH, loader=load_lookup_grid).get()
+    except FileNotFoundError:
+        return None
+    return grid.data if grid.data.model_id == grid_id else None
+
 
 # Example usage
 if __name__ == "__main__":
-    # Test the predictor
-    predictor = EventSuccessPredictor()
-    
+    predictor = get_predictor()
     test_event = {
-        'title': 'Data Science Hackathon',
-        'category': 'Technology',
-        'department': 'Computer',
-        'targetYear': '3',
-        'maxCapacity': '50',
-        'location': 'Computer Lab',
-        'date': '2024-11-15',  # Friday
-        'time': '14:00',
-        'tags': ['data', 'python', 'ml']
+        "category": "Technology",
+        "department": "Computer",
+        "target_year": "3",
+        "max_capacity": "50",
+        "tags": ["data", "python", "ml"],
     }
-    
-    try:
-        prediction = predictor.predict(test_event)
-        print(f"🎯 Predicted success rate: {prediction}%")
-    except Exception as e:
-        print(f"Prediction failed: {e}")
+    print(f"🎯 Prediction: {predictor.predict(test_event)}")
+    print(f"Feature importances: {predictor.explain_prediction()}")
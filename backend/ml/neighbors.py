@@ -0,0 +1,190 @@
+# ml/neighbors.py
+# Nearest-neighbour backends for student similarity. The KMeans clusters act as
+# the coarse partition (IVF lists); a backend finds the closest students inside
+# the query student's cluster.
+#
+#   exact              brute-force distances to every student in the cluster
+#   random_projection  LSH buckets from random hyperplanes, exact re-rank of the
+#                      bucket candidates only
+#   auto               exact below AUTO_EXACT_MAX_STUDENTS, random_projection above
+
+import time
+
+import numpy as np
+from scipy import sparse
+
+from .config import django_setting
+
+AUTO_EXACT_MAX_STUDENTS = 5000
+
+
+def configured_backend():
+    return django_setting('STUDENT_SIMILARITY_BACKEND', 'auto')
+
+
+def _squared_norms(features):
+    if sparse.issparse(features):
+        return np.asarray(features.multiply(features).sum(axis=1), dtype=np.float64).ravel()
+    return np.einsum('ij,ij->i', features, features, dtype=np.float64)
+
+
+def _distances(features, rows, query_row, sq_norms=None):
+    if not sparse.issparse(features):
+        return np.linalg.norm(features[rows] - features[query_row], axis=1)
+    # ||a - b||^2 = ||a||^2 + ||b||^2 - 2 a.b, computed on non-zeros only
+    dots = (features[rows] @ features[query_row].T).toarray().ravel()
+    squared = sq_norms[rows] + sq_norms[query_row] - 2 * dots
+    return np.sqrt(np.maximum(squared, 0))
+
+
+def _top_k(rows, dists, k):
+    # O(n) selection, then a small sort; ties broken by row so results are deterministic
+    if len(rows) > k:
+        keep = dists <= np.partition(dists, k - 1)[k - 1]
+        rows, dists = rows[keep], dists[keep]
+    order = np.lexsort((rows, dists))[:k]
+    return rows[order], dists[order]
+
+
+class ExactNeighborIndex:
+    backend = 'exact'
+
+    def __init__(self, features, clusters):
+        self.features = features
+        self.clusters = clusters
+        self.sq_norms = _squared_norms(features) if sparse.issparse(features) else None
+        self.cluster_rows = {int(c): np.flatnonzero(clusters == c) for c in np.unique(clusters)}
+
+    @classmethod
+    def build(cls, features, clusters, **options):
+        return cls(features, clusters)
+
+    @classmethod
+    def from_arrays(cls, features, clusters, arrays):
+        return cls(features, clusters)
+
+    def arrays(self):
+        return {}
+
+    def cluster_members(self, row):
+        members = self.cluster_rows[int(self.clusters[row])]
+        return members[members != row]
+
+    def candidates(self, row):
+        return self.cluster_members(row)
+
+    def search(self, row, k):
+        rows = self.candidates(row)
+        return _top_k(rows, _distances(self.features, rows, row, self.sq_norms), k)
+
+
+class RandomProjectionIndex(ExactNeighborIndex):
+    """
+    Each of n_tables hash tables signs the centred feature vector against n_bits
+    random hyperplanes. Students sharing a bucket with the query in any table
+    (and in the same cluster) are re-ranked exactly; if that yields fewer than k
+    candidates the search falls back to the whole cluster.
+    """
+    backend = 'random_projection'
+
+    def __init__(self, features, clusters, center, planes, codes):
+        super().__init__(features, clusters)
+        self.center = center
+        self.planes = planes
+        self.codes = codes
+        # Per table: rows sorted by code, so a bucket is one searchsorted range
+        self.order = np.argsort(codes, axis=0, kind='stable')
+        self.sorted_codes = np.take_along_axis(codes, self.order, axis=0)
+
+    @staticmethod
+    def hash_codes(features, center, planes):
+        n_tables, n_bits, _ = planes.shape
+        flat = planes.reshape(n_tables * n_bits, -1)
+        # (x - center) @ P.T without densifying sparse features
+        projected = np.asarray(features @ flat.T) - center @ flat.T
+        bits = (projected > 0).reshape(features.shape[0], n_tables, n_bits)
+        weights = (1 << np.arange(n_bits, dtype=np.int64))
+        return (bits * weights).sum(axis=2).astype(np.int64)
+
+    @classmethod
+    def build(cls, features, clusters, n_tables=16, n_bits=8, seed=42, **options):
+        rng = np.random.default_rng(seed)
+        center = np.asarray(features.mean(axis=0), dtype=np.float32).ravel()
+        planes = rng.standard_normal((n_tables, n_bits, features.shape[1])).astype(np.float32)
+        return cls(features, clusters, center, planes, cls.hash_codes(features, center, planes))
+
+    @classmethod
+    def from_arrays(cls, features, clusters, arrays):
+        return cls(features, clusters, arrays['center'], arrays['planes'], arrays['codes'])
+
+    def arrays(self):
+        return {'center': self.center, 'planes': self.planes, 'codes': self.codes}
+
+    def candidates(self, row):
+        code = self.codes[row]
+        buckets = []
+        for t in range(self.codes.shape[1]):
+            lo, hi = np.searchsorted(self.sorted_codes[:, t], [code[t], code[t] + 1])
+            buckets.append(self.order[lo:hi, t])
+        rows = np.unique(np.concatenate(buckets))
+        return rows[(self.clusters[rows] == self.clusters[row]) & (rows != row)]
+
+    def search(self, row, k):
+        rows = self.candidates(row)
+        if len(rows) < k:
+            rows = self.cluster_members(row)
+        return _top_k(rows, _distances(self.features, rows, row, self.sq_norms), k)
+
+
+BACKENDS = {
+    ExactNeighborIndex.backend: ExactNeighborIndex,
+    RandomProjectionIndex.backend: RandomProjectionIndex,
+}
+
+
+def resolve_backend(name, n_students):
+    if name == 'auto':
+        return 'exact' if n_students <= AUTO_EXACT_MAX_STUDENTS else 'random_projection'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown similarity backend: {name}")
+    return name
+
+
+def build_neighbor_index(features, clusters, backend=None, **options):
+    name = resolve_backend(backend or configured_backend(), features.shape[0])
+    return BACKENDS[name].build(features, clusters, **options)
+
+
+def load_neighbor_index(name, features, clusters, arrays):
+    return BACKENDS[name].from_arrays(features, clusters, arrays)
+
+
+def benchmark_neighbor_index(features, clusters, k=5, n_queries=200, backends=None, seed=0, **options):
+    """
+    Compare backends against exact search on random query students.
+    Returns {backend: {"recall_at_k", "avg_query_ms", "build_s"}}.
+    """
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(features.shape[0], size=min(n_queries, features.shape[0]), replace=False)
+    exact = ExactNeighborIndex.build(features, clusters)
+    truth = {int(q): set(exact.search(q, k)[0].tolist()) for q in queries}
+
+    report = {}
+    for name in backends or BACKENDS:
+        start = time.perf_counter()
+        index = BACKENDS[name].build(features, clusters, **options)
+        build_s = time.perf_counter() - start
+
+        hits = expected = 0
+        start = time.perf_counter()
+        for q in queries:
+            found = index.search(q, k)[0]
+            hits += len(truth[int(q)].intersection(found.tolist()))
+            expected += len(truth[int(q)])
+        elapsed = time.perf_counter() - start
+        report[name] = {
+            "recall_at_k": round(hits / expected, 4) if expected else 1.0,
+            "avg_query_ms": round(elapsed / len(queries) * 1000, 4),
+            "build_s": round(build_s, 4),
+        }
+    return report
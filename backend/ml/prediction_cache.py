@@ -0,0 +1,95 @@
+# ml/prediction_cache.py
+# In-process LRU/TTL cache for event predictions. Organizers re-submit the same
+# form while tweaking it, so identical encoded feature rows are scored over and
+# over; the cache keeps the forest's output per (model version, feature row).
+
+import threading
+import time
+from collections import OrderedDict
+
+from .config import django_setting
+
+
+class PredictionCache:
+    """
+    Bounded LRU with a per-entry time-to-live. Thread-safe; hit/miss counters
+    survive clear() so the hit rate covers the whole process lifetime.
+    """
+
+    def __init__(self, maxsize=2048, ttl=600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if self.ttl is None or expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires_at = self.clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (called when a retrained model is swapped in)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def configured_cache_options():
+    """(maxsize, ttl) from EVENT_PREDICTION_CACHE_SIZE / EVENT_PREDICTION_CACHE_TTL"""
+    return (django_setting('EVENT_PREDICTION_CACHE_SIZE', 2048),
+            django_setting('EVENT_PREDICTION_CACHE_TTL', 600))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                maxsize, ttl = configured_cache_options()
+                _cache = PredictionCache(maxsize=maxsize, ttl=ttl)
+    return _cache
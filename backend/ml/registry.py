@@ -0,0 +1,140 @@
+# ml/registry.py
+# Process-wide registry that keeps ML artifacts in memory and hot-swaps them when
+# a retrain writes a new version to disk.
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+from .config import django_setting
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), 'model.pkl')
+FOREST_PATH = os.path.join(os.path.dirname(__file__), 'model.forest')
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def file_version(path):
+    """Short content hash used to identify which artifact served a request"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def atomic_write(path, write_fn, mode='wb'):
+    """
+    Write an artifact to a temp file in the same directory and move it into place,
+    so readers only ever see the old file or the complete new one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, mode) as f:
+            write_fn(f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class LoadedArtifact:
+    def __init__(self, data, version, stamp):
+        self.data = data
+        self.version = version
+        self.stamp = stamp
+
+
+class ModelRegistry:
+    """
+    Loads an artifact once and serves it from memory. Every lookup compares the
+    file's mtime/size with the loaded copy; when it changed, the new version is
+    loaded fully and then swapped in with a single reference assignment, so
+    in-flight requests keep using the object they already hold.
+    """
+
+    def __init__(self, path, loader=_load_pickle):
+        self.path = path
+        self.loader = loader
+        self._current = None
+        self._lock = threading.Lock()
+
+    def _stamp(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self):
+        stamp = self._stamp()
+        current = self._current
+        if current is not None and current.stamp == stamp:
+            return current
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            current = self._current
+            if current is not None and current.stamp == self._stamp():
+                return current
+            return self._reload()
+
+    def refresh(self):
+        with self._lock:
+            return self._reload()
+
+    def _reload(self):
+        while True:
+            stamp = self._stamp()
+            version = file_version(self.path)
+            data = self.loader(self.path)
+            # A retrain may have replaced the file while we were reading it
+            if self._stamp() == stamp:
+                break
+        loaded = LoadedArtifact(data=data, version=version, stamp=stamp)
+        self._current = loaded
+        print(f"[ML] Loaded {os.path.basename(self.path)} version {loaded.version}")
+        return loaded
+
+    @property
+    def version(self):
+        current = self._current
+        return current.version if current is not None else None
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(path=MODEL_PATH, loader=_load_pickle):
+    path = os.path.abspath(path)
+    registry = _registries.get(path)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(path, ModelRegistry(path, loader))
+    return registry
+
+
+def configured_model_format():
+    return django_setting('EVENT_MODEL_FORMAT', 'forest')
+
+
+def _event_model_registry():
+    if configured_model_format() == 'forest' and os.path.exists(FOREST_PATH):
+        from .forest_artifact import load_event_model_artifact
+        return get_registry(FOREST_PATH, loader=load_event_model_artifact)
+    return get_registry(MODEL_PATH)
+
+
+def get_event_model():
+    """Return the currently served event prediction model (a LoadedArtifact)"""
+    return _event_model_registry().get()
+
+
+def refresh_event_model():
+    """Reload the served event model after a retrain and return it"""
+    return _event_model_registry().refresh()
@@ -2,25 +2,91 @@
 # Utilities for loading the clustering model and finding similar students
 
 import joblib
-import pandas as pd
 import numpy as np
 import os
+from scipy import sparse
 from sklearn.cluster import KMeans
+from .feature_engineering import FEATURES_PATH, FEATURE_COLUMNS_PATH, load_student_features, select_columns
+from .neighbors import build_neighbor_index, load_neighbor_index
+from .registry import atomic_write, get_registry
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'student_cluster_model.pkl')
-FEATURES_PATH = os.path.join(os.path.dirname(__file__), 'student_features.csv')
 FEATURE_LIST_PATH = os.path.join(os.path.dirname(__file__), 'student_cluster_features.txt')
+INDEX_PATH = os.path.join(os.path.dirname(__file__), 'student_similarity_index.npz')
+
+SPARSE_ARRAYS = ('features', 'tag_matrix')
+
+
+def _pack_csr(name, matrix):
+    return {
+        f'{name}_data': matrix.data,
+        f'{name}_indices': matrix.indices,
+        f'{name}_indptr': matrix.indptr,
+        f'{name}_shape': np.array(matrix.shape),
+    }
+
+
+def _unpack_csr(name, arrays):
+    return sparse.csr_matrix(
+        (arrays.pop(f'{name}_data'), arrays.pop(f'{name}_indices'), arrays.pop(f'{name}_indptr')),
+        shape=tuple(arrays.pop(f'{name}_shape')),
+    )
+
+
+class StudentSimilarityIndex:
+    """
+    Per-student feature vectors (sparse CSR) and cluster assignments, precomputed
+    once per training run, plus the neighbour index selected by
+    STUDENT_SIMILARITY_BACKEND (see ml/neighbors.py).
+    """
+
+    def __init__(self, user_ids, usernames, features, clusters, tag_names, tag_matrix, neighbors):
+        self.user_ids = user_ids
+        self.usernames = usernames
+        self.features = features
+        self.clusters = clusters
+        self.tag_names = tag_names
+        self.tag_matrix = tag_matrix
+        self.neighbors = neighbors
+        self.row_of = {int(uid): row for row, uid in enumerate(user_ids)}
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        for name in SPARSE_ARRAYS:
+            arrays[name] = _unpack_csr(name, arrays)
+        nn_arrays = {name[3:]: arrays.pop(name) for name in list(arrays) if name.startswith('nn_')}
+        backend = str(nn_arrays.pop('backend'))
+        arrays['neighbors'] = load_neighbor_index(backend, arrays['features'], arrays['clusters'], nn_arrays)
+        return cls(**arrays)
+
+    def save(self, path=INDEX_PATH):
+        arrays = {
+            'user_ids': self.user_ids,
+            'usernames': self.usernames,
+            'clusters': self.clusters,
+            'tag_names': self.tag_names,
+            'nn_backend': np.array(self.neighbors.backend),
+        }
+        for name in SPARSE_ARRAYS:
+            arrays.update(_pack_csr(name, getattr(self, name)))
+        arrays.update({f'nn_{name}': value for name, value in self.neighbors.arrays().items()})
+        atomic_write(path, lambda f: np.savez(f, **arrays))
+
+    def nearest(self, user_id, top_n=5):
+        """Rows of the top_n closest students in the same cluster and their distances"""
+        row = self.row_of.get(int(user_id))
+        if row is None:
+            return np.empty(0, dtype=int), np.empty(0)
+        return self.neighbors.search(row, top_n)
 
-_model = None
-_features_df = None
 
 def load_model():
-    # Always reload the model from disk to avoid caching issues after retrain
-    return joblib.load(MODEL_PATH)
+    return get_registry(MODEL_PATH, loader=joblib.load).get().data
 
 def load_features():
-    # Always reload features from disk (optional, but safe for dynamic updates)
-    return pd.read_csv(FEATURES_PATH)
+    return load_student_features()
 
 def load_feature_list():
     # Each line is a feature column name
@@ -28,55 +94,86 @@ def load_feature_list():
         return [line.strip() for line in f if line.strip() and line.strip() not in ('user_id', 'username')]
 
 def get_student_features(user_id):
-    df = load_features()
-    feature_cols = load_feature_list()
-    row = df[df['user_id'] == user_id]
-    if row.empty:
+    features = load_features()
+    rows = np.flatnonzero(features.user_ids == user_id)
+    if len(rows) == 0:
+        return None
+    return select_columns(features, load_feature_list())[rows]
+
+def build_similarity_index(model=None, features=None, backend=None):
+    """Assign every student to a cluster and save the vectors and neighbour index used for lookups"""
+    model = model if model is not None else joblib.load(MODEL_PATH)
+    features = features if features is not None else load_features()
+    X = select_columns(features, load_feature_list())
+    tag_cols = [i for i, col in enumerate(features.columns) if col.startswith('tag_')]
+    tag_values = features.matrix[:, tag_cols].tocsr()
+    vectors = X.astype(np.float32)
+    clusters = model.predict(X).astype(np.int32)
+    index = StudentSimilarityIndex(
+        user_ids=features.user_ids,
+        usernames=np.array(features.usernames, dtype=str),
+        features=vectors,
+        clusters=clusters,
+        tag_names=np.array([features.columns[i].replace('tag_', '', 1) for i in tag_cols], dtype=str),
+        tag_matrix=(tag_values == 1).astype(np.int8).tocsr().sorted_indices(),
+        neighbors=build_neighbor_index(vectors, clusters, backend),
+    )
+    index.save(INDEX_PATH)
+    return index
+
+def rebuild_similarity_index():
+    """
+    Rebuild the index from the model and features on disk. Called on the write
+    side (after a feature export); returns None while there is no clustering model.
+    """
+    if not os.path.exists(MODEL_PATH):
         return None
-    return row[feature_cols].fillna(0).values
+    return build_similarity_index()
+
+def _index_is_stale():
+    built = os.path.getmtime(INDEX_PATH)
+    return any(
+        os.path.exists(p) and os.path.getmtime(p) > built
+        for p in (MODEL_PATH, FEATURES_PATH, FEATURE_COLUMNS_PATH, FEATURE_LIST_PATH)
+    )
+
+def _load_index(path):
+    index = StudentSimilarityIndex.load(path)
+    if _index_is_stale():
+        # Serve it anyway: rebuilding is the writer's job, never a request's
+        print(f"[ML] {os.path.basename(path)} is older than the clustering model or features; "
+              "run the student clustering job to rebuild it")
+    return index
+
+def load_similarity_index():
+    """The served index; raises FileNotFoundError until one has been built"""
+    return get_registry(INDEX_PATH, loader=_load_index).get().data
 
 def get_similar_students(user_id, top_n=5):
-    model = load_model()
-    df = load_features()
-    feature_cols = load_feature_list()
-    user_feats = get_student_features(user_id)
-    if user_feats is None:
-        return []
-    cluster = model.predict(user_feats)[0]
-    all_feats = df[feature_cols].fillna(0).values
-    all_clusters = model.predict(all_feats)
-    df['cluster'] = all_clusters
-    similar = df[(df['cluster'] == cluster) & (df['user_id'] != user_id)]
-    dists = np.linalg.norm(similar[feature_cols].values - user_feats, axis=1)
-    similar = similar.copy()
-    similar['distance'] = dists
-    similar = similar.sort_values('distance').head(top_n)
+    index = load_similarity_index()
+    rows, dists = index.nearest(user_id, top_n)
     # Build full response for frontend
     results = []
-    for _, row in similar.iterrows():
+    for row, distance in zip(rows, dists):
+        uid = int(index.user_ids[row])
         # Use username as name fallback
-        name = row.get('username', f"Student {row.get('user_id', '')}")
-        # Dummy events count (could be improved)
-        events = int(row.get('events', 0)) if 'events' in row else 0
+        name = index.usernames[row] or f"Student {uid}"
         # Similarity: convert distance to similarity percentage (simple inverse)
-        similarity = max(0, int(100 - row['distance']))
-        # Interests: collect all tag columns with value 1
-        interests = [col.replace('tag_', '') for col in df.columns if col.startswith('tag_') and row.get(col, 0) == 1]
+        similarity = max(0, int(100 - distance))
         results.append({
-            'user_id': row['user_id'],
-            'name': name,
-            'events': events,
+            'user_id': uid,
+            'name': str(name),
+            'events': 0,  # Dummy events count (could be improved)
             'similarity': similarity,
-            'interests': interests
+            'interests': index.tag_names[index.tag_matrix[row].indices].tolist()
         })
     return results
 
 def train_clustering_model():
-    df = pd.read_csv(FEATURES_PATH)
-    feature_cols = load_feature_list()
-    X = df[feature_cols].fillna(0).values
+    features = load_features()
+    X = select_columns(features, load_feature_list())
     kmeans = KMeans(n_clusters=5, random_state=42)
     kmeans.fit(X)
-    joblib.dump(kmeans, MODEL_PATH)
+    atomic_write(MODEL_PATH, lambda f: joblib.dump(kmeans, f))
+    build_similarity_index(kmeans, features)
     print("Clustering model trained and saved.")
-
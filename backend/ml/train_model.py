@@ -1,9 +1,25 @@
+import argparse
+import copy
+import json
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 import pickle
 import os
-from .clean_data import clean_event_dataset
+import time
+import uuid
+from datetime import datetime
+from .dataset_store import load_clean_event_dataset
+from .model import FEATURES, EventSuccessPredictor
+from .forest_artifact import save_forest
+from .lookup_grid import CAPACITY_STEP, GRID_PATH, build_lookup_grid, capacity_knots, lookup_grid_enabled, save_lookup_grid
+from .registry import FOREST_PATH, atomic_write, get_event_model, refresh_event_model
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+# One JSON line per training run, so speed/quality regressions show up over time
+REPORTS_PATH = os.path.join(ML_DIR, "model_training_reports.jsonl")
 
 def preprocess_data(df):
     # Map categories manually (you can save these too)
@@ -35,26 +51,204 @@ def preprocess_data(df):
 
     return df, category_map, dept_map, year_map
 
-def train_model():
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    data_path = os.path.join(base_dir, "ml", "data", "event_dataset.csv")
-    df = clean_event_dataset(data_path)
+
+def _load_training_frame(data_path):
+    # Cleaning only reruns when event_dataset.csv changed
+    df = load_clean_event_dataset(data_path)
     df, cat_map, dept_map, year_map = preprocess_data(df)
+    return df, cat_map, dept_map, year_map
+
+
+def _split_holdout(X, y, holdout):
+    """(X_train, X_test, y_train, y_test); no test rows when holdout is 0 or there is too little data"""
+    n_test = int(len(X) * holdout)
+    if n_test < 2 or len(X) - n_test < 2:
+        return X, X.iloc[:0], y, y.iloc[:0]
+    return train_test_split(X, y, test_size=holdout, random_state=42)
+
+
+def _previous_model(model_path):
+    """A private copy of the current artifact (never the registry's served object, which warm start would mutate)"""
+    if not os.path.exists(model_path):
+        return None
+    with open(model_path, "rb") as f:
+        return pickle.load(f)
+
+
+def append_training_report(report, reports_path=REPORTS_PATH):
+    with open(reports_path, "a") as f:
+        f.write(json.dumps(report) + "\n")
+
+
+def load_training_reports(reports_path=REPORTS_PATH):
+    if not os.path.exists(reports_path):
+        return []
+    with open(reports_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _save_lookup_grid(model_data, df, capacity_step):
+    """Score the whole encoded feature space once and save it as model.grid.npz"""
+    start = time.perf_counter()
+    grid = build_lookup_grid(
+        EventSuccessPredictor(model_data).predict_with_confidence,
+        n_categories=max(model_data["category_map"].values()) + 1,
+        n_departments=max(model_data["department_map"].values()) + 1,
+        n_years=max(model_data["year_map"].values()) + 1,
+        capacities=capacity_knots(df["capacity"], capacity_step),
+        max_tags=int(df["num_tags"].max()),
+        model_id=model_data["lookup_grid_id"],
+    )
+    save_lookup_grid(GRID_PATH, grid)
+    return {
+        "cells": grid.cells,
+        "capacity_step": capacity_step,
+        "build_seconds": round(time.perf_counter() - start, 3),
+        "bytes": os.path.getsize(GRID_PATH),
+    }
+
+
+def _noop_report(model_path, model):
+    """Report for a warm start that found nothing new to fit"""
+    # Nothing was written, so the served model is still current
+    loaded = get_event_model()
+    return {
+        "model_version": loaded.version,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "mode": "noop",
+        "rows": 0,
+        "fit_rows": 0,
+        "holdout_rows": 0,
+        "n_estimators": model.n_estimators,
+        "n_jobs": None,
+        "fit_seconds": 0.0,
+        "r2": None,
+        "mae": None,
+        "artifact_bytes": os.path.getsize(model_path),
+        "forest_bytes": os.path.getsize(FOREST_PATH) if os.path.exists(FOREST_PATH) else None,
+        "lookup_grid": None,
+    }
 
-    features = ["category", "department", "target_year", "capacity", "num_tags"]
-    X = df[features]
-    y = df["success_rate"]
 
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
+def _holdout_scores(model, X, y, holdout):
+    """(holdout_rows, r2, mae) from a copy of model fitted without the held-out rows"""
+    X_train, X_test, y_train, y_test = _split_holdout(X, y, holdout)
+    if not len(X_test):
+        return 0, None, None
+    predictions = copy.deepcopy(model).fit(X_train, y_train).predict(X_test)
+    return (len(X_test), round(float(r2_score(y_test, predictions)), 4),
+            round(float(mean_absolute_error(y_test, predictions)), 4))
+
+
+def fit_event_model(warm_start=False, new_trees=50, holdout=0.2, n_jobs=-1, lookup_grid=None,
+                    capacity_step=CAPACITY_STEP):
+    """
+    Train the event prediction model and save it as model.pkl.
+
+    Full mode fits a fresh forest on all cores. warm_start=True instead adds
+    `new_trees` trees fitted only on the rows whose row_key the previous model
+    was not trained on, keeping the existing trees (rows updated in place are
+    not revisited until the next full run). Either way R²/MAE come from a
+    separate fit that holds out a `holdout` fraction of those rows; the saved
+    model is then fitted on all of them.
+
+    With lookup_grid (default: the EVENT_PREDICTION_LOOKUP_GRID setting) the
+    model's answers are also precomputed into model.grid.npz.
+
+    Returns (model_version, report); the report is also appended to
+    model_training_reports.jsonl next to the model.
+    """
+    data_path = os.path.join(ML_DIR, "data", "event_dataset.csv")
+    model_path = os.path.join(ML_DIR, "model.pkl")
+    df, cat_map, dept_map, year_map = _load_training_frame(data_path)
+
+    previous = _previous_model(model_path) if warm_start else None
+    if warm_start and (previous is None or "trained_keys" not in previous):
+        print("[ML] No warm-startable model found, training from scratch")
+        previous = None
+    mode = "warm_start" if previous is not None else "full"
+
+    if previous is not None:
+        rows = df[~df["row_key"].isin(previous["trained_keys"])]
+        if rows.empty:
+            print("[ML] No new rows since the last training run, keeping the current model")
+            report = _noop_report(model_path, previous["model"])
+            append_training_report(report, REPORTS_PATH)
+            return report["model_version"], report
+        model = previous["model"]
+        model.set_params(warm_start=True, n_jobs=n_jobs, n_estimators=model.n_estimators + new_trees)
+    else:
+        rows = df
+        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
+
+    X, y = rows[FEATURES], rows["success_rate"]
+    holdout_rows, r2, mae = _holdout_scores(model, X, y, holdout)
+    start = time.perf_counter()
     model.fit(X, y)
-    model_path = os.path.join(base_dir, "ml", "model.pkl")
-    with open(model_path, "wb") as f:
-        pickle.dump({
-            "model": model,
-            "category_map": cat_map,
-            "department_map": dept_map,
-            "year_map": year_map
-        }, f)
+    fit_seconds = time.perf_counter() - start
+    # Serve single-threaded (a thread pool per one-row predict costs more than it saves)
+    # and never keep growing this forest by accident
+    model.set_params(warm_start=False, n_jobs=None)
+
+    model_data = {
+        "model": model,
+        "category_map": cat_map,
+        "department_map": dept_map,
+        "year_map": year_map,
+        # Every row the forest has seen, so the next warm start fits only the rest
+        "trained_keys": sorted(set(df["row_key"])),
+        # Stored with the artifact so the forest copy can explain predictions too
+        "feature_importances": dict(zip(FEATURES, model.feature_importances_.tolist())),
+    }
+    grid_report = None
+    if lookup_grid is None:
+        lookup_grid = lookup_grid_enabled()
+    if lookup_grid:
+        # Written before the model, so a worker that sees the new model finds its grid
+        model_data["lookup_grid_id"] = uuid.uuid4().hex[:12]
+        grid_report = _save_lookup_grid(model_data, df, capacity_step)
+    # Write to a temp file and swap it in so serving workers never read a partial pickle.
+    # The pickle keeps the sklearn forest and trained row keys (needed for warm starts);
+    # the API serves the compact memory-mapped copy in model.forest
+    atomic_write(model_path, lambda f: pickle.dump(model_data, f))
+    save_forest(FOREST_PATH, model, {key: value for key, value in model_data.items()
+                                     if key not in ("model", "trained_keys")})
+    loaded = refresh_event_model()
+
+    report = {
+        "model_version": loaded.version,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "mode": mode,
+        "rows": len(df),
+        "fit_rows": len(X),
+        "holdout_rows": holdout_rows,
+        "n_estimators": model.n_estimators,
+        "n_jobs": n_jobs,
+        "fit_seconds": round(fit_seconds, 3),
+        "r2": r2,
+        "mae": mae,
+        "artifact_bytes": os.path.getsize(model_path),
+        "forest_bytes": os.path.getsize(FOREST_PATH),
+        "lookup_grid": grid_report,
+    }
+    append_training_report(report, REPORTS_PATH)
+    print(f"[ML] Event prediction model saved as version {loaded.version} "
+          f"({mode}, {report['fit_seconds']}s, R²={report['r2']}, MAE={report['mae']})")
+    return loaded.version, report
+
+
+def train_model(**options):
+    return fit_event_model(**options)[0]
+
 
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Train the event success prediction model")
+    parser.add_argument("--warm-start", action="store_true", help="Add trees for rows appended since the last run")
+    parser.add_argument("--new-trees", type=int, default=50)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--lookup-grid", action="store_true", default=None,
+                        help="Also precompute model.grid.npz (default: EVENT_PREDICTION_LOOKUP_GRID)")
+    parser.add_argument("--capacity-step", type=int, default=CAPACITY_STEP, help="Seats between lookup grid knots")
+    args = parser.parse_args()
+    train_model(warm_start=args.warm_start, new_trees=args.new_trees, holdout=args.holdout,
+                lookup_grid=args.lookup_grid, capacity_step=args.capacity_step)
@@ -1,7 +1,6 @@
-# train_model.py
-# Train clustering models on student_features.csv and save the best model as student_cluster_model.pkl
+# train_model_students.py
+# Train clustering models on the student features and save the best model as student_cluster_model.pkl
 
-import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans, DBSCAN, AgglomerativeClustering
 from sklearn.preprocessing import StandardScaler
@@ -9,47 +8,65 @@ from sklearn.metrics import silhouette_score
 from sklearn.decomposition import PCA
 import joblib
 
+from ml.feature_engineering import load_student_features
 
-# Load features
-import os
-features_path = os.path.join(os.path.dirname(__file__), 'student_features.csv')
-df = pd.read_csv(features_path)
-feature_cols = [col for col in df.columns if col not in ['user_id', 'username']]
-X = df[feature_cols].fillna(0)
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# KMeans
-kmeans = KMeans(n_clusters=3, random_state=42)
-kmeans_labels = kmeans.fit_predict(X_scaled)
-kmeans_sil = silhouette_score(X_scaled, kmeans_labels)
-
-# DBSCAN
-dbscan = DBSCAN(eps=1.5, min_samples=2)
-dbscan_labels = dbscan.fit_predict(X_scaled)
-try:
-    dbscan_sil = silhouette_score(X_scaled, dbscan_labels)
-except Exception:
-    dbscan_sil = -1
-
-# Agglomerative
-agglo = AgglomerativeClustering(n_clusters=3)
-agglo_labels = agglo.fit_predict(X_scaled)
-agglo_sil = silhouette_score(X_scaled, agglo_labels)
-
-print(f'KMeans Silhouette: {kmeans_sil:.3f}')
-print(f'DBSCAN Silhouette: {dbscan_sil:.3f}')
-print(f'Agglomerative Silhouette: {agglo_sil:.3f}')
-
-# Save the best model (highest silhouette)
-scores = {'kmeans': kmeans_sil, 'dbscan': dbscan_sil, 'agglo': agglo_sil}
-best = max(scores, key=scores.get)
-if best == 'kmeans':
-    joblib.dump(kmeans, 'student_cluster_model.pkl')
-    print('Saved KMeans model to student_cluster_model.pkl')
-elif best == 'agglo':
-    joblib.dump(agglo, 'student_cluster_model.pkl')
-    print('Saved Agglomerative model to student_cluster_model.pkl')
-else:
-    joblib.dump(dbscan, 'student_cluster_model.pkl')
-    print('Saved DBSCAN model to student_cluster_model.pkl')
+# AgglomerativeClustering needs a dense matrix and O(n^2) memory; above this many
+# students it is fitted and scored on a random sample of this size instead
+AGGLO_MAX_ROWS = 5000
+
+
+def compare_clustering_models(matrix, agglo_max_rows=AGGLO_MAX_ROWS):
+    """
+    Fit each candidate on the sparse CSR features; returns ({name: silhouette},
+    {name: model}, {name: note}) where the notes say which models were not fitted
+    on every row.
+    """
+    # Without centring the scaler keeps the matrix sparse
+    scaler = StandardScaler(with_mean=False)
+    X_scaled = scaler.fit_transform(matrix)
+
+    # KMeans
+    kmeans = KMeans(n_clusters=3, random_state=42)
+    kmeans_labels = kmeans.fit_predict(X_scaled)
+    kmeans_sil = silhouette_score(X_scaled, kmeans_labels)
+
+    # DBSCAN
+    dbscan = DBSCAN(eps=1.5, min_samples=2)
+    dbscan_labels = dbscan.fit_predict(X_scaled)
+    try:
+        dbscan_sil = silhouette_score(X_scaled, dbscan_labels)
+    except Exception:
+        dbscan_sil = -1
+
+    # Agglomerative, densified only up to agglo_max_rows rows
+    notes = {}
+    X_agglo = X_scaled
+    if X_scaled.shape[0] > agglo_max_rows:
+        rows = np.random.default_rng(42).choice(X_scaled.shape[0], agglo_max_rows, replace=False)
+        X_agglo = X_scaled[np.sort(rows)]
+        notes['agglo'] = f"fitted on a random sample of {agglo_max_rows} of {X_scaled.shape[0]} students"
+    agglo = AgglomerativeClustering(n_clusters=3)
+    agglo_labels = agglo.fit_predict(X_agglo.toarray())
+    agglo_sil = silhouette_score(X_agglo, agglo_labels)
+
+    scores = {'kmeans': kmeans_sil, 'dbscan': dbscan_sil, 'agglo': agglo_sil}
+    models = {'kmeans': kmeans, 'dbscan': dbscan, 'agglo': agglo}
+    return scores, models, notes
+
+
+if __name__ == "__main__":
+    # Load features (sparse CSR from feature_engineering)
+    features = load_student_features()
+    scores, models, notes = compare_clustering_models(features.matrix)
+
+    print(f"KMeans Silhouette: {scores['kmeans']:.3f}")
+    print(f"DBSCAN Silhouette: {scores['dbscan']:.3f}")
+    print(f"Agglomerative Silhouette: {scores['agglo']:.3f}")
+    for name, note in notes.items():
+        print(f"Note: {name} {note}")
+
+    # Save the best model (highest silhouette)
+    best = max(scores, key=scores.get)
+    names = {'kmeans': 'KMeans', 'agglo': 'Agglomerative', 'dbscan': 'DBSCAN'}
+    joblib.dump(models[best], 'student_cluster_model.pkl')
+    print(f'Saved {names[best]} model to student_cluster_model.pkl')